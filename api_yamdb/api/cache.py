@@ -0,0 +1,87 @@
+"""Кэш готовых ответов и числа строк для списков.
+
+Ключ содержит номер поколения пространства имён (обычно модели): при
+записи в модель поколение увеличивается, и все её старые ответы и
+счётчики перестают находиться, не требуя перебора ключей. Счётчики попаданий и
+времени ответа хранятся в том же кэше, поэтому при общем бэкенде
+(memcached, Redis) статистика общая для всех процессов.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+STATS_FIELDS = ('hits', 'misses', 'hit_us', 'miss_us')
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _key(namespace, *parts):
+    return ':'.join(('response', namespace, *parts))
+
+
+def _increment(cache, key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def generation(namespace):
+    return get_cache().get_or_set(_key(namespace, 'generation'), 1, None)
+
+
+def invalidate(namespace):
+    """Делает недействительными все сохранённые ответы `namespace`."""
+    _increment(get_cache(), _key(namespace, 'generation'))
+
+
+def response_key(namespace, variant, kind='body'):
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return _key(namespace, str(generation(namespace)), kind, digest)
+
+
+def count_key(namespace, variant):
+    return response_key(namespace, variant, kind='count')
+
+
+def load(key):
+    return get_cache().get(key)
+
+
+def store(key, value, timeout=None):
+    if timeout is None:
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 600)
+    get_cache().set(key, value, timeout)
+
+
+def record(namespace, hit, seconds):
+    """Учитывает попадание или промах и время ответа в микросекундах."""
+    cache = get_cache()
+    count, duration = ('hits', 'hit_us') if hit else ('misses', 'miss_us')
+    _increment(cache, _key(namespace, 'stats', count))
+    _increment(cache, _key(namespace, 'stats', duration),
+               int(seconds * 1_000_000))
+
+
+def stats(namespace):
+    cache = get_cache()
+    values = cache.get_many(
+        [_key(namespace, 'stats', field) for field in STATS_FIELDS]
+    )
+    hits, misses, hit_us, miss_us = (
+        values.get(_key(namespace, 'stats', field), 0)
+        for field in STATS_FIELDS
+    )
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'hit_avg_ms': round(hit_us / hits / 1000, 3) if hits else None,
+        'miss_avg_ms': round(miss_us / misses / 1000, 3) if misses else None,
+    }
@@ -0,0 +1,164 @@
+"""Быстрый путь сериализации списков без ModelSerializer.
+
+`compile_serializer` один раз на запрос разбирает поля сериализатора в
+список колонок для `values()` и готовых функций преобразования, а
+`CompiledSerializer.represent` строит из строк-словарей тот же вывод,
+что и `serializer.data`. Для представления значений используются
+`to_representation` тех же полей DRF, поэтому JSON совпадает побайтно.
+Сериализаторы с полями, которые так разобрать нельзя, возвращают None -
+для них остаётся обычный путь.
+"""
+
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+
+class CompiledSerializer:
+
+    def __init__(self, model, getters, many_relations):
+        self.model = model
+        self.getters = getters
+        self.many_relations = many_relations
+
+    @property
+    def columns(self):
+        columns = ['id']
+        for _, column, _ in self.getters:
+            if isinstance(column, tuple):
+                columns.append(column[0])
+                columns.extend(column[1])
+            elif column not in columns:
+                columns.append(column)
+        return columns
+
+    def values(self, queryset, extra=()):
+        """values()-запрос с колонками полей и полями `extra`."""
+        columns = self.columns
+        columns.extend(
+            name for name in (*extra, *queryset.query.extra_select)
+            if name not in columns
+        )
+        return queryset.prefetch_related(None).values(*columns)
+
+    def represent(self, rows):
+        rows = list(rows)
+        related = {
+            name: relation.load([row['id'] for row in rows])
+            for name, relation in self.many_relations.items()
+        }
+        data = []
+        for row in rows:
+            item = OrderedDict()
+            for name, column, to_representation in self.getters:
+                if name in related:
+                    item[name] = related[name].get(row['id'], [])
+                    continue
+                if isinstance(column, tuple):
+                    value = row[column[0]]
+                    item[name] = None if value is None else to_representation(
+                        row
+                    )
+                    continue
+                value = row[column]
+                item[name] = None if value is None else to_representation(
+                    value
+                )
+            data.append(item)
+        return data
+
+
+class ManyRelation:
+    """Вложенный `many=True` сериализатор по полю ManyToMany."""
+
+    def __init__(self, field, nested):
+        self.field = field
+        self.nested = nested
+
+    def load(self, ids):
+        if not ids:
+            return {}
+        query_name = self.field.related_query_name()
+        rows = self.field.related_model.objects.filter(
+            **{f'{query_name}__in': ids}
+        ).values(query_name, *self.nested.columns)
+        result = {}
+        for row in rows:
+            result.setdefault(row[query_name], []).append(row)
+        return {
+            pk: self.nested.represent(items) for pk, items in result.items()
+        }
+
+
+def _nested_getter(prefix, compiled):
+    getters = [
+        (name, f'{prefix}__{column}', to_representation)
+        for name, column, to_representation in compiled.getters
+    ]
+
+    def to_representation(row):
+        return OrderedDict(
+            (name, None if row[column] is None else represent(row[column]))
+            for name, column, represent in getters
+        )
+    return (prefix, [column for _, column, _ in getters]), to_representation
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def _compile_field(field, model_field):
+    """Возвращает `(колонка, функция)` или `(ManyRelation, None)`."""
+    if isinstance(field, serializers.ListSerializer):
+        if not isinstance(field.child, serializers.ModelSerializer) or (
+            not isinstance(model_field, models.ManyToManyField)
+        ):
+            raise NotCompilable
+        return ManyRelation(model_field, _compile(field.child)), None
+    if isinstance(field, serializers.ModelSerializer):
+        nested = _compile(field)
+        if nested.many_relations or not model_field.many_to_one or any(
+            isinstance(column, tuple) for _, column, _ in nested.getters
+        ):
+            raise NotCompilable
+        return _nested_getter(field.source, nested)
+    if isinstance(field, serializers.SlugRelatedField):
+        if not model_field.many_to_one:
+            raise NotCompilable
+        return f'{field.source}__{field.slug_field}', lambda value: value
+    if model_field.is_relation or isinstance(field, (
+        serializers.RelatedField, serializers.ListField,
+        serializers.DictField, serializers.SerializerMethodField
+    )):
+        raise NotCompilable
+    return field.source, field.to_representation
+
+
+def _compile(serializer):
+    model = serializer.Meta.model
+    getters = []
+    many_relations = {}
+    for name, field in serializer.fields.items():
+        if not field.source or '.' in field.source or field.source == '*':
+            raise NotCompilable
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise NotCompilable
+        column, to_representation = _compile_field(field, model_field)
+        if isinstance(column, ManyRelation):
+            many_relations[name] = column
+            column = 'id'
+        getters.append((name, column, to_representation))
+    return CompiledSerializer(model, getters, many_relations)
+
+
+def compile_serializer(serializer):
+    """Разбирает сериализатор или возвращает None, если это невозможно."""
+    try:
+        return _compile(serializer)
+    except NotCompilable:
+        return None
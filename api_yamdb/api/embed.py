@@ -0,0 +1,84 @@
+"""Встраивание отзывов и комментариев в ответы (`?include=`).
+
+`?include=reviews,comments` добавляет к произведению последние отзывы,
+а к каждому отзыву - последние комментарии. Их число задают
+`?reviews_limit=` и `?comments_limit=`. Комментарии для всех отзывов
+выбираются одним запросом: номер комментария внутри отзыва считает
+оконная функция ROW_NUMBER().
+"""
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from reviews.models import Comment, Review
+
+from .compiled import compile_serializer
+from .mixins import split_param
+from .serializers import CommentSerializer, ReviewSerializer
+
+INCLUDE_PARAM = 'include'
+LIMITS = {
+    'reviews': ('reviews_limit', 5, 50),
+    'comments': ('comments_limit', 3, 20),
+}
+NEWEST_FIRST = (F('pub_date').desc(), F('id').desc())
+
+
+def included(request):
+    return split_param(request, INCLUDE_PARAM) or set()
+
+
+def embed_limit(request, relation):
+    param, default, maximum = LIMITS[relation]
+    try:
+        limit = int(request.query_params[param])
+    except (KeyError, ValueError):
+        return default
+    return max(0, min(limit, maximum))
+
+
+def latest_per_review(queryset, limit):
+    """Оставляет в выборке комментариев не больше `limit` на отзыв."""
+    ranked = queryset.annotate(rank=Window(
+        RowNumber(), partition_by=[F('review_id')], order_by=NEWEST_FIRST
+    )).values('id', 'rank')
+    sql, params = ranked.query.sql_with_params()
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[
+            f'{table}.id IN (SELECT ranked.id FROM ({sql}) ranked '
+            'WHERE ranked.rank <= %s)'
+        ],
+        params=[*params, limit],
+    )
+
+
+def embed_comments(request, reviews):
+    """Добавляет `comments` в представления отзывов.
+
+    `reviews` - пары `(id отзыва, представление)`.
+    """
+    limit = embed_limit(request, 'comments')
+    compiled = compile_serializer(CommentSerializer(context={}))
+    rows = list(compiled.values(latest_per_review(
+        Comment.objects.filter(review_id__in=[pk for pk, _ in reviews]),
+        limit
+    ), ('review_id',)).order_by(*NEWEST_FIRST))
+    comments = {}
+    for row, item in zip(rows, compiled.represent(rows)):
+        comments.setdefault(row['review_id'], []).append(item)
+    for pk, item in reviews:
+        item['comments'] = comments.get(pk, [])
+
+
+def embed_reviews(request, title_id):
+    """Последние отзывы произведения, с комментариями по запросу."""
+    compiled = compile_serializer(ReviewSerializer(context={}))
+    rows = list(compiled.values(
+        Review.objects.filter(title_id=title_id).order_by(*NEWEST_FIRST)
+    )[:embed_limit(request, 'reviews')])
+    data = compiled.represent(rows)
+    if 'comments' in included(request):
+        embed_comments(request, [
+            (row['id'], item) for row, item in zip(rows, data)
+        ])
+    return data
@@ -1,13 +1,41 @@
-from django_filters import CharFilter, FilterSet, NumberFilter
+from django_filters import BaseInFilter, CharFilter, FilterSet, NumberFilter
 from reviews.models import Title
+from reviews.search import search_titles
+
+
+class NumberInFilter(BaseInFilter, NumberFilter):
+    pass
+
+
+class CharInFilter(BaseInFilter, CharFilter):
+    pass
 
 
 class TitleFilters(FilterSet):
     name = CharFilter(field_name='name', lookup_expr='icontains')
-    year = NumberFilter(field_name='year', lookup_expr='icontains')
+    year = NumberFilter(field_name='year', lookup_expr='exact')
+    year_min = NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = NumberFilter(field_name='year', lookup_expr='lte')
+    year__in = NumberInFilter(field_name='year', lookup_expr='in')
     category = CharFilter(field_name='category__slug', lookup_expr='icontains')
     genre = CharFilter(field_name='genre__slug', lookup_expr='icontains')
+    genre__any = CharInFilter(
+        field_name='genre__slug', lookup_expr='in', distinct=True
+    )
+    genre__all = CharInFilter(method='filter_genre_all')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'category', 'genre',)
+        fields = (
+            'name', 'year', 'year_min', 'year_max', 'year__in', 'category',
+            'genre', 'genre__any', 'genre__all', 'search',
+        )
+
+    def filter_genre_all(self, queryset, name, value):
+        for slug in value:
+            queryset = queryset.filter(genre__slug=slug)
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,113 @@
+"""Management-команда для замера стоимости сериализации списков."""
+
+import time
+
+from accounts.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+from reviews.models import Categories, Comment, Genres, Review, Title
+
+from api.compiled import compile_serializer
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+
+
+class Command(BaseCommand):
+    """Сравнивает ModelSerializer и скомпилированный путь на одних данных.
+
+    Данные создаются внутри транзакции, которая затем откатывается.
+    """
+
+    help = 'Замеряет стоимость сериализации строки: DRF и compiled.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            review = self.create_data(options['rows'])
+            cases = (
+                (
+                    'titles', TitleSerializer,
+                    Title.objects.select_related('category').prefetch_related(
+                        Prefetch('genre', queryset=Genres.objects.only(
+                            'name', 'slug'
+                        ))
+                    ),
+                ),
+                (
+                    'reviews', ReviewSerializer,
+                    Review.objects.select_related('title', 'author'),
+                ),
+                (
+                    'comments', CommentSerializer,
+                    review.comments.select_related('review', 'author'),
+                ),
+            )
+            for name, serializer_class, queryset in cases:
+                self.compare(name, serializer_class, queryset,
+                             options['repeat'])
+            transaction.set_rollback(True)
+
+    def create_data(self, rows):
+        category = Categories.objects.create(name='Фильм', slug='bench-film')
+        genres = [
+            Genres.objects.create(name=f'Жанр {i}', slug=f'bench-genre-{i}')
+            for i in range(3)
+        ]
+        author = User.objects.create(
+            username='bench-author', email='bench@yamdb.fake'
+        )
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {i}', year=2000, category=category,
+                  description='Описание ' * 20, rating=7.5)
+            for i in range(rows)
+        )
+        for title in Title.objects.filter(category=category):
+            title.genre.set(genres[:2])
+        User.objects.bulk_create(
+            User(username=f'bench-{i}', email=f'bench-{i}@yamdb.fake')
+            for i in range(rows)
+        )
+        users = User.objects.filter(username__startswith='bench-')[:rows]
+        title = Title.objects.filter(category=category).first()
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='Отзыв', score=7)
+            for user in users
+        )
+        review = Review.objects.filter(title=title).first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='Комментарий')
+            for _ in range(rows)
+        )
+        self.stdout.write(f'Создано строк на сущность: {rows}')
+        return review
+
+    def measure(self, function, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, rows
+
+    def compare(self, name, serializer_class, queryset, repeat):
+        compiled = compile_serializer(serializer_class())
+
+        def drf():
+            return len(serializer_class(queryset.all(), many=True).data)
+
+        def fast():
+            return len(compiled.represent(compiled.values(queryset.all())))
+
+        drf_time, rows = self.measure(drf, repeat)
+        fast_time, _ = self.measure(fast, repeat)
+        self.stdout.write(
+            f'{name}: {rows} строк, '
+            f'DRF {drf_time / rows * 1e6:.1f} мкс/строка, '
+            f'compiled {fast_time / rows * 1e6:.1f} мкс/строка, '
+            f'ускорение x{drf_time / fast_time:.1f}'
+        )
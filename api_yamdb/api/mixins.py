@@ -1,6 +1,19 @@
-"""Кастомный миксин для приложения Api."""
+"""Кастомные миксины для приложения Api."""
 
+import hashlib
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins, viewsets
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from . import cache
+from .compiled import compile_serializer
 
 
 class CRUDMixin(
@@ -10,3 +23,231 @@ class CRUDMixin(
     viewsets.GenericViewSet
 ):
     pass
+
+
+def split_param(request, name):
+    value = request.query_params.get(name) if request else None
+    if not value:
+        return None
+    return {item.strip() for item in value.split(',')}
+
+
+def sparse_fields(request, fields):
+    """Поля ответа с учётом параметров `?fields=a,b` и `?omit=c`.
+
+    Применяется только к безопасным методам: при записи сериализатору
+    нужны все поля для валидации.
+    """
+    fields = list(fields)
+    if request is None or request.method not in SAFE_METHODS:
+        return fields
+    wanted = split_param(request, 'fields')
+    if wanted is not None:
+        fields = [name for name in fields if name in wanted]
+    omitted = split_param(request, 'omit')
+    if omitted is not None:
+        fields = [name for name in fields if name not in omitted]
+    return fields
+
+
+class SparseFieldsSerializerMixin:
+    """Оставляет в выводе сериализатора только запрошенные поля."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = sparse_fields(self.context.get('request'), fields)
+        return {name: fields[name] for name in selected}
+
+
+class SparseFieldsViewMixin:
+    """Загружает из БД только колонки запрошенных полей.
+
+    `sparse_columns` сопоставляет полю сериализатора колонки модели.
+    """
+    sparse_columns = {}
+
+    def get_sparse_fields(self):
+        return sparse_fields(self.request, self.sparse_columns)
+
+    def only_sparse_fields(self, queryset, fields=None):
+        if fields is None:
+            fields = self.get_sparse_fields()
+        columns = ['id']
+        for name in fields:
+            columns.extend(self.sparse_columns[name])
+        return queryset.only(*columns)
+
+
+class NestedParentMixin:
+    """Родитель вложенного ресурса, загруженный один раз на запрос.
+
+    `parent_lookups` сопоставляет поля родителя и аргументы URL, так что
+    отзыв чужого произведения даёт 404. `view.parent` кэшируется на
+    время запроса и доступен сериализатору (`context['view']`) и
+    разрешениям. Детальные запросы родителя не загружают: условие на
+    него из `parent_filter()` добавляется к выборке самого объекта.
+    """
+    parent_queryset = None
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_lookups(self):
+        return {
+            field: self.kwargs.get(kwarg)
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    @property
+    def parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(
+                self.parent_queryset.all(), **self.get_parent_lookups()
+            )
+        return self._parent
+
+    def parent_filter(self):
+        """Условие на родителя для выборки дочерних объектов."""
+        return {
+            f'{self.parent_field}__{field}': value
+            for field, value in self.get_parent_lookups().items()
+        }
+
+
+class CompiledListMixin:
+    """list() по строкам values() без ModelSerializer.
+
+    Ответ совпадает с обычным побайтно, см. `api.compiled`.
+    `compiled_extra_columns` - колонки, которые нужны пагинации.
+    """
+    compiled_list = True
+    compiled_extra_columns = ()
+
+    def get_compiled_serializer(self):
+        if not self.compiled_list:
+            return None
+        return compile_serializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+        queryset = compiled.values(
+            self.filter_queryset(self.get_queryset()),
+            self.compiled_extra_columns
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.represent_rows(compiled, page)
+            )
+        return Response(self.represent_rows(compiled, queryset))
+
+    def represent_rows(self, compiled, rows):
+        return compiled.represent(rows)
+
+
+class ConditionalGetMixin:
+    """Условные GET по версии ресурса.
+
+    `get_resource_version()` одним лёгким запросом возвращает
+    `(версия, pub_date)`; ETag строится из версии, `Last-Modified` - из
+    `pub_date`. Если клиент прислал совпадающий `If-None-Match` или
+    `If-Modified-Since`, отдаётся 304 без загрузки и сериализации
+    объектов.
+    """
+
+    def get_resource_version(self):
+        """`(версия, pub_date или None)` или None - без условного GET."""
+        return None
+
+    def get_etag(self, version):
+        """Сильный ETag: версия плюс отпечаток URL и формата ответа."""
+        variant = '|'.join((
+            self.request.get_full_path(),
+            self.request.META.get('HTTP_ACCEPT', ''),
+        ))
+        digest = hashlib.md5(variant.encode()).hexdigest()[:12]
+        return quote_etag(f'{self.basename}-{version}-{digest}')
+
+    def conditional(self, handler, request, *args, **kwargs):
+        state = self.get_resource_version()
+        if state is None:
+            return handler(request, *args, **kwargs)
+        version, last_modified = state
+        etag = self.get_etag(version)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CachedListMixin:
+    """Отдаёт list() из кэша готовых ответов (см. `api.cache`).
+
+    Кэшируются ответы в JSON для каждого абсолютного URL (хост и схема
+    входят в ключ: в ответе есть ссылки `next`/`previous`); они
+    сбрасываются сигналами при записи в модель. Ответ помечается
+    заголовками `X-Cache` и `Server-Timing`, а `Cache-Control` позволяет
+    хранить его промежуточным кэшам `RESPONSE_CACHE_MAX_AGE` секунд.
+    """
+    cached_formats = ('json',)
+
+    def get_cache_namespace(self):
+        return self.queryset.model._meta.label_lower
+
+    def get_list_cache_key(self, request):
+        if request.accepted_renderer.format not in self.cached_formats:
+            return None
+        return cache.response_key(self.get_cache_namespace(), '|'.join((
+            request.build_absolute_uri(), request.accepted_media_type
+        )))
+
+    def list(self, request, *args, **kwargs):
+        self.cache_started = time.perf_counter()
+        self.cache_hit = False
+        self.cache_key = self.get_list_cache_key(request)
+        cached = self.cache_key and cache.load(self.cache_key)
+        if not cached:
+            return super().list(request, *args, **kwargs)
+        self.cache_hit, self.cache_key = True, None
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if self.action != 'list' or response.status_code != 200:
+            return response
+        hit = getattr(self, 'cache_hit', False)
+        if getattr(self, 'cache_key', None):
+            response.render()
+            cache.store(
+                self.cache_key, (response.content, response['Content-Type'])
+            )
+        elif not hit:
+            return response
+        seconds = time.perf_counter() - self.cache_started
+        cache.record(self.get_cache_namespace(), hit, seconds)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        response['Server-Timing'] = f'cache;dur={seconds * 1000:.3f}'
+        patch_cache_control(
+            response, public=True,
+            max_age=getattr(settings, 'RESPONSE_CACHE_MAX_AGE', 60)
+        )
+        return response
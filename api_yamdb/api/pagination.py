@@ -0,0 +1,381 @@
+"""Пагинация для приложения Api."""
+
+import base64
+import datetime
+import json
+import re
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework import status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cache
+
+
+def estimate_count(queryset):
+    """Оценка числа строк планировщиком PostgreSQL или None."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    match = re.search(r'rows=(\d+)', queryset.explain())
+    return int(match.group(1)) if match else None
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """LimitOffset без COUNT(*) на каждый запрос.
+
+    По умолчанию точное число строк берётся из кэша по SQL-запросу
+    выборки; кэш сбрасывается при записи в модель (см. `api.signals`) и
+    живёт не дольше `PAGINATION_COUNT_TTL` секунд. `?count=estimate` -
+    оценка планировщика СУБД там, где она есть. `?count=false` - без
+    подсчёта: выбирается на строку больше страницы, чтобы узнать, есть
+    ли следующая, а ключа `count` в ответе нет.
+    """
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = request.query_params.get(
+            self.count_query_param, ''
+        ).lower()
+        if self.count_mode != 'false':
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count = None
+        self.display_page_controls = False
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_more = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_count(self, queryset):
+        if not isinstance(queryset, QuerySet):
+            return super().get_count(queryset)
+        if self.count_mode == 'estimate':
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate
+        try:
+            sql, params = queryset.query.clone().sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = cache.count_key(
+            queryset.model._meta.label_lower, f'{sql}|{params!r}'
+        )
+        count = cache.load(key)
+        if count is None:
+            count = super().get_count(queryset)
+            cache.store(
+                key, count, getattr(settings, 'PAGINATION_COUNT_TTL', 60)
+            )
+        return count
+
+    def get_next_link(self):
+        if self.count is not None:
+            return super().get_next_link()
+        if not self.has_more:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        if self.count is not None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict((
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        )))
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Даты в курсоре с микросекундами: DjangoJSONEncoder их урезает."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу (keyset) без OFFSET и COUNT(*).
+
+    Курсор хранит значения полей `ordering` последней строки страницы,
+    следующая страница выбирается условием `(a, b) > (x, y)`, поэтому
+    глубокие страницы стоят столько же, сколько первая. Последним полем
+    в `ordering` должен быть уникальный ключ, а для полного набора полей
+    должен существовать составной индекс.
+
+    Курсор задаёт порядок строк сам, поэтому вместе с ним `?ordering=`
+    с другим порядком (у представлений с `ordering_fields`) и параметры
+    из `ranking_params` со своим порядком выдачи (релевантность поиска) -
+    ошибка 400.
+    """
+    ordering = ('id',)
+    ranking_params = ()
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор.'
+    ordering_conflict_message = (
+        'Курсор задаёт порядок {ordering}, параметр `{param}` с ним '
+        'несовместим.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.check_ordering(request, view)
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(
+                ordering, position
+            ))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def check_ordering(self, request, view=None):
+        params = request.query_params
+        conflicts = [param for param in self.ranking_params if params.get(
+            param
+        )]
+        requested = params.get(api_settings.ORDERING_PARAM)
+        if requested and getattr(view, 'ordering_fields', None):
+            fields = tuple(field.strip() for field in requested.split(','))
+            if fields != self.ordering[:len(fields)]:
+                conflicts.insert(0, api_settings.ORDERING_PARAM)
+        if conflicts:
+            ordering = ', '.join(self.ordering)
+            raise ValidationError({self.cursor_query_param: [
+                self.ordering_conflict_message.format(
+                    ordering=f'({ordering})', param=param
+                )
+                for param in conflicts
+            ]})
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+        return tuple(
+            field[1:] if field.startswith('-') else f'-{field}'
+            for field in self.ordering
+        )
+
+    def get_position_filter(self, ordering, position):
+        """Лексикографическое сравнение `(f1, ..., fn)` с курсором."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            name = field.lstrip('-')
+            equal = {
+                previous.lstrip('-'): position[number]
+                for number, previous in enumerate(ordering[:index])
+            }
+            equal[f'{name}__{lookup}'] = position[index]
+            conditions.append(Q(**equal))
+        return reduce(or_, conditions)
+
+    def get_position(self, instance):
+        if isinstance(instance, dict):
+            return [instance[field.lstrip('-')] for field in self.ordering]
+        return [
+            getattr(instance, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = payload['p'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def cursor_value(self, position, reverse=False):
+        payload = {'p': position}
+        if reverse:
+            payload['r'] = 1
+        data = json.dumps(payload, cls=CursorEncoder, ensure_ascii=False)
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def encode_cursor(self, position, reverse=False):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.cursor_value(position, reverse)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(
+            self.get_position(self.page[0]), reverse=True
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class OptionalKeysetPagination(CachedCountPagination):
+    """LimitOffset по умолчанию, keyset - если передан параметр `cursor`.
+
+    Первая страница в режиме keyset запрашивается с пустым курсором:
+    `?cursor=`.
+    """
+    keyset_class = KeysetPagination
+
+    def get_keyset_class(self, request):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            return self.keyset_class
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        keyset_class = self.get_keyset_class(request)
+        if keyset_class is not None:
+            self.keyset = keyset_class()
+            self.display_page_controls = False
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('name', 'id')
+    ranking_params = ('search',)
+
+
+class TitlePagination(OptionalKeysetPagination):
+    keyset_class = TitleKeysetPagination
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    ordering = ('pub_date', 'id')
+
+
+class SincePagination(PubDateKeysetPagination):
+    """Опрос новых строк: `?since=<курсор>`.
+
+    Возвращает строки новее курсора (пустой `since` - с начала) и
+    курсор последней из них в поле `cursor` и заголовке `X-Cursor`.
+    Если новых строк нет, ответ - 204 без тела. Стоимость зависит от
+    числа новых строк, а не от размера всего списка.
+    """
+    cursor_query_param = 'since'
+    cursor_header = 'X-Cursor'
+
+    def decode_cursor(self, request):
+        position, _ = super().decode_cursor(request)
+        return position, False
+
+    def get_paginated_response(self, data):
+        if self.page:
+            cursor = self.cursor_value(self.get_position(self.page[-1]))
+        else:
+            cursor = self.request.query_params[self.cursor_query_param]
+        if data:
+            response = Response(OrderedDict((
+                ('cursor', cursor),
+                ('next', self.get_next_link()),
+                ('results', data),
+            )))
+        else:
+            response = Response(status=status.HTTP_204_NO_CONTENT)
+        if cursor:
+            response[self.cursor_header] = cursor
+        return response
+
+
+class PubDatePagination(OptionalKeysetPagination):
+    """Отзывы и комментарии: keyset по индексу `(родитель, pub_date, id)`.
+
+    `?since=` переключает на опрос новых строк (`SincePagination`).
+    """
+    keyset_class = PubDateKeysetPagination
+    since_class = SincePagination
+
+    def get_keyset_class(self, request):
+        if self.since_class.cursor_query_param in request.query_params:
+            return self.since_class
+        return super().get_keyset_class(request)
+
+
+class AuthorActivityPagination(KeysetPagination):
+    """Отзывы и комментарии пользователя, новые первыми.
+
+    Индекс `(author, pub_date, id)` читается в обратном порядке, поэтому
+    страница стоит одинаково и для новичка, и для самого активного
+    автора.
+    """
+    ordering = ('-pub_date', '-id')
@@ -40,7 +40,7 @@ class IsAuthorOrAdminOrModerator(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return bool(
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.role == 'moderator'
             or request.user.role == 'admin'
         )
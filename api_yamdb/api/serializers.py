@@ -2,11 +2,11 @@
 import datetime
 
 from accounts.models import User
-from django.core.exceptions import ValidationError
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from reviews.models import Categories, Comment, Genres, Review, Title
 
+from .mixins import SparseFieldsSerializerMixin, split_param
 from .validators import validate_dublicates, validate_role, validate_username
 
 
@@ -100,6 +100,15 @@ class GetJWTSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True)
 
 
+def histogram_requested(request):
+    if not request:
+        return False
+    return (
+        request.query_params.get('histogram') == 'true'
+        or 'score_histogram' in (split_param(request, 'fields') or ())
+    )
+
+
 class CategoriesSerializer(serializers.ModelSerializer):
     """Сериализатор для категорий."""
 
@@ -116,22 +125,42 @@ class GenresSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
     """GET-cериализатор для произведений."""
 
     category = CategoriesSerializer(many=False, read_only=True)
     genre = GenresSerializer(many=True, read_only=True)
-    rating = serializers.IntegerField()
+    rating = serializers.IntegerField(read_only=True)
+    reviews_count = serializers.IntegerField(
+        source='rating_count',
+        read_only=True
+    )
+    score_histogram = serializers.ListField(
+        child=serializers.IntegerField(),
+        read_only=True
+    )
 
     class Meta:
         model = Title
         fields = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category',
+            'id', 'name', 'year', 'rating', 'reviews_count', 'description',
+            'genre', 'category', 'score_histogram',
         )
         read_only_fields = (
             'id', 'name', 'year', 'rating', 'description',
         )
 
+    def get_fields(self):
+        """Гистограмма оценок выводится только по запросу.
+
+        `?histogram=true` или `score_histogram` в `?fields=`.
+        """
+        fields = super().get_fields()
+        if not histogram_requested(self.context.get('request')):
+            fields.pop('score_histogram', None)
+        return fields
+
 
 class TitleCRUDSerializer(serializers.ModelSerializer):
     """CRUD-cериализатор для произведений."""
@@ -160,7 +189,103 @@ class TitleCRUDSerializer(serializers.ModelSerializer):
         return value
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки произведений.
+
+    Категория и жанры принимаются как слаги и проверяются по БД сразу
+    для всей пачки в `validate_bulk_titles`.
+    """
+
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
+    validate_year = TitleCRUDSerializer.validate_year
+
+
+DUPLICATE_TITLE = (
+    'Произведение с таким названием, годом и категорией уже существует.'
+)
+
+
+def _missing_slug(slug):
+    return serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ].format(slug_name='slug', value=slug)
+
+
+def validate_bulk_titles(data):
+    """Проверяет пачку произведений.
+
+    Возвращает `(элементы, ошибки)`: элементы - пары `(индекс, (поля
+    Title, id жанров))` для `reviews.bulk.create_titles`, ошибки -
+    `{индекс: ошибки элемента}`. Слаги категорий и жанров всей пачки
+    проверяются двумя запросами.
+    """
+    child = TitleBulkSerializer()
+    valid, errors = [], {}
+    for index, item in enumerate(data):
+        try:
+            valid.append((index, child.run_validation(item)))
+        except serializers.ValidationError as error:
+            errors[index] = error.detail
+    categories = dict(Categories.objects.filter(
+        slug__in={fields['category'] for _, fields in valid}
+    ).values_list('slug', 'pk'))
+    genres = dict(Genres.objects.filter(
+        slug__in={slug for _, fields in valid for slug in fields['genre']}
+    ).values_list('slug', 'pk'))
+    items = []
+    for index, fields in valid:
+        slugs = dict.fromkeys(fields.pop('genre'))
+        item_errors = {}
+        if fields['category'] not in categories:
+            item_errors['category'] = [_missing_slug(fields['category'])]
+        missing = [slug for slug in slugs if slug not in genres]
+        if missing:
+            item_errors['genre'] = [_missing_slug(slug) for slug in missing]
+        if item_errors:
+            errors[index] = item_errors
+            continue
+        fields['category_id'] = categories[fields.pop('category')]
+        items.append((index, (fields, [genres[slug] for slug in slugs])))
+    return _exclude_duplicates(items, errors), errors
+
+
+def _media_key(fields):
+    return fields['name'], fields['year'], fields['category_id']
+
+
+def _exclude_duplicates(items, errors):
+    """Убирает нарушающие `unique_media` элементы и добавляет их ошибки.
+
+    Совпадения с существующими произведениями ищутся одним запросом,
+    повторы внутри пачки - за один проход: остаётся первый.
+    """
+    if not items:
+        return items
+    keys = [_media_key(fields) for _, (fields, _) in items]
+    taken = set(Title.objects.filter(
+        name__in={name for name, _, _ in keys},
+        category_id__in={category for _, _, category in keys},
+    ).values_list('name', 'year', 'category_id'))
+    unique = []
+    for (index, item), key in zip(items, keys):
+        if key in taken:
+            errors[index] = {
+                api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_TITLE]
+            }
+            continue
+        taken.add(key)
+        unique.append((index, item))
+    return unique
+
+
+class ReviewSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     title = serializers.SlugRelatedField(
         slug_field='name',
         read_only=True
@@ -175,24 +300,14 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Оценка по 10-бальной шкале!')
         return value
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if (
-            request.method == 'POST'
-            and Review.objects.filter(title=title, author=author).exists()
-        ):
-            raise ValidationError('Может существовать только один отзыв!')
-        return data
-
     class Meta:
-        fields = '__all__'
+        exclude = ('version', 'comments_version')
+        read_only_fields = ('comments_count',)
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     review = serializers.SlugRelatedField(
         slug_field='text',
         read_only=True
@@ -203,5 +318,30 @@ class CommentSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = '__all__'
+        exclude = ('version',)
+        model = Comment
+
+
+class TitleShortSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        fields = ('id', 'name')
+        model = Title
+
+
+class UserReviewSerializer(serializers.ModelSerializer):
+    """Отзыв в ленте активности пользователя."""
+    title = TitleShortSerializer(read_only=True)
+
+    class Meta:
+        fields = ('id', 'title', 'text', 'score', 'pub_date')
+        model = Review
+
+
+class UserCommentSerializer(serializers.ModelSerializer):
+    """Комментарий в ленте активности пользователя."""
+    title = TitleShortSerializer(source='review.title', read_only=True)
+
+    class Meta:
+        fields = ('id', 'review', 'title', 'text', 'pub_date')
         model = Comment
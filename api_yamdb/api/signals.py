@@ -0,0 +1,37 @@
+"""Сигналы приложения api."""
+
+from functools import partial
+
+from accounts.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from reviews.models import (Categories, Comment, Genres, Review, Title,
+                            TitleGenres)
+
+from . import cache
+
+# Чьи закэшированные ответы и счётчики устаревают при записи в модель.
+# Удаление категории обнуляет её у произведений без сигналов `Title`.
+INVALIDATES = {
+    User: (User,),
+    Categories: (Categories, Title),
+    Genres: (Genres, Title),
+    Title: (Title,),
+    TitleGenres: (Title,),
+    Review: (Review,),
+    Comment: (Comment,),
+}
+
+
+def model_changed(sender, **kwargs):
+    """Сбрасывает кэш после коммита записи в модель."""
+    for model in INVALIDATES[sender]:
+        transaction.on_commit(
+            partial(cache.invalidate, model._meta.label_lower)
+        )
+
+
+for sender in INVALIDATES:
+    post_save.connect(model_changed, sender=sender)
+    post_delete.connect(model_changed, sender=sender)
+m2m_changed.connect(model_changed, sender=TitleGenres)
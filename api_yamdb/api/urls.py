@@ -7,6 +7,7 @@ from api.views import (
     ReviewViewSet,
     TitleViewSet,
     UserViewSet,
+    cache_stats,
     get_jwt,
     send_token,
 )
@@ -30,4 +31,5 @@ urlpatterns = [
     path("v1/", include(router.urls)),
     path('v1/auth/signup/', send_token, name='send_token'),
     path('v1/auth/token/', get_jwt, name='get_jwt'),
+    path('v1/cache-stats/', cache_stats, name='cache_stats'),
 ]
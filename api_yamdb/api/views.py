@@ -1,21 +1,40 @@
+import json
+
 from accounts.models import User
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view,
+                                       permission_classes)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import SearchFilter
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Categories, Genres, Review, Title
+from reviews import leaderboards
+from reviews.bulk import create_titles
+from reviews.catalog import get_engine
+from reviews.models import (SCORE_FIELDS, Categories, Comment, Genres, Review,
+                            Title, TitleNeighbour)
+from reviews.recommendations import recommend
+from reviews.similar import K as SIMILAR_MAX_SIZE
+from reviews.similar import neighbour_ids
 
+from .embed import embed_comments, embed_reviews, included
 from .filters import TitleFilters
-from .mixins import CRUDMixin
+from . import cache
+from .mixins import (CachedListMixin, CompiledListMixin, ConditionalGetMixin,
+                     CRUDMixin, NestedParentMixin, SparseFieldsViewMixin)
+from .pagination import (AuthorActivityPagination, CachedCountPagination,
+                         PubDatePagination, TitlePagination)
 from .permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorOrAdminOrModerator
 from .serializers import (
     CategoriesSerializer,
@@ -26,10 +45,25 @@ from .serializers import (
     SendTokenSerializer,
     TitleCRUDSerializer,
     TitleSerializer,
+    UserCommentSerializer,
+    UserReviewSerializer,
     UserSerializer,
+    histogram_requested,
+    validate_bulk_titles,
 )
 
 
+def query_limit(request, default, maximum=None):
+    """`?limit=`: нечисловое или неположительное значение - `default`."""
+    try:
+        limit = int(request.query_params['limit'])
+    except (KeyError, ValueError):
+        return default
+    if limit <= 0:
+        return default
+    return limit if maximum is None else min(limit, maximum)
+
+
 @api_view(['POST'])
 def send_token(request):
     """
@@ -105,7 +139,7 @@ class UserViewSet(viewsets.ModelViewSet):
     filter_backends = (SearchFilter, )
     search_fields = ('username', )
     http_method_names = ['get', 'post', 'patch', 'delete']
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
 
     @action(
         methods=['get', 'patch'],
@@ -132,8 +166,153 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.data)
 
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='me/recommendations'
+    )
+    def recommendations(self, request):
+        """
+        Returns titles the current user has not reviewed yet.
+
+        Titles are ranked by the score predicted by the offline model
+        (see reviews.recommendations). Users unknown to the model get
+        the global leaderboard instead.
+        """
+        limit = query_limit(request, 10, maximum=100)
+        reviewed = set(
+            request.user.reviews.values_list('title_id', flat=True)
+        )
+        entries = recommend(request.user.pk, reviewed, limit)
+        if entries is None:
+            entries = [
+                entry for entry in leaderboards.top_title_ids(
+                    leaderboards.GLOBAL_BOARD
+                ) if entry[0] not in reviewed
+            ][:limit]
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).in_bulk([title_id for title_id, _ in entries])
+        data = []
+        for title_id, score in entries:
+            if title_id not in titles:
+                continue
+            item = TitleSerializer(
+                titles[title_id], context={'request': request}
+            ).data
+            item['predicted_score'] = round(score, 3)
+            data.append(item)
+        return Response(data)
+
+    def activity(self, author_id, queryset, serializer_class):
+        """Страница отзывов или комментариев автора, новые первыми."""
+        paginator = AuthorActivityPagination()
+        page = paginator.paginate_queryset(
+            queryset.filter(author_id=author_id), self.request, view=self
+        )
+        serializer = serializer_class(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def author_reviews(self, author_id):
+        return self.activity(
+            author_id,
+            Review.objects.select_related('title').only(
+                'id', 'text', 'score', 'pub_date', 'title__name'
+            ),
+            UserReviewSerializer
+        )
+
+    def author_comments(self, author_id):
+        return self.activity(
+            author_id,
+            Comment.objects.select_related('review__title').only(
+                'id', 'text', 'pub_date', 'review__title__name'
+            ),
+            UserCommentSerializer
+        )
+
+    def get_author_id(self, username):
+        return get_object_or_404(
+            User.objects.only('pk'), username=username
+        ).pk
+
+    @action(
+        methods=['get'],
+        detail=True,
+        permission_classes=(IsAuthenticated,)
+    )
+    def reviews(self, request, username=None):
+        """
+        Returns reviews written by the user, newest first.
+
+        :param request: The HTTP request object.
+        :param username: The author's username.
+        :return: A cursor-paginated page of reviews with their titles.
+        """
+        return self.author_reviews(self.get_author_id(username))
+
+    @action(
+        methods=['get'],
+        detail=True,
+        permission_classes=(IsAuthenticated,)
+    )
+    def comments(self, request, username=None):
+        """
+        Returns comments written by the user, newest first.
+
+        :param request: The HTTP request object.
+        :param username: The author's username.
+        :return: A cursor-paginated page of comments with their titles.
+        """
+        return self.author_comments(self.get_author_id(username))
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='me/reviews'
+    )
+    def my_reviews(self, request):
+        """
+        Returns the current user's reviews, newest first.
+
+        :param request: The HTTP request object.
+        :return: A cursor-paginated page of reviews with their titles.
+        """
+        return self.author_reviews(request.user.pk)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        permission_classes=(IsAuthenticated,),
+        url_path='me/comments'
+    )
+    def my_comments(self, request):
+        """
+        Returns the current user's comments, newest first.
+
+        :param request: The HTTP request object.
+        :return: A cursor-paginated page of comments with their titles.
+        """
+        return self.author_comments(request.user.pk)
 
-class CategoryViewSet(CRUDMixin):
+
+@api_view(['GET'])
+@permission_classes((IsAdmin,))
+def cache_stats(request):
+    """Попадания в кэш ответов и среднее время ответа по справочникам."""
+    return Response({
+        name: cache.stats(viewset.queryset.model._meta.label_lower)
+        for name, viewset in (
+            ('categories', CategoryViewSet), ('genres', GenreViewSet)
+        )
+    })
+
+
+class CategoryViewSet(CachedListMixin, CRUDMixin):
     queryset = Categories.objects.all()
     serializer_class = CategoriesSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -142,7 +321,7 @@ class CategoryViewSet(CRUDMixin):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CRUDMixin):
+class GenreViewSet(CachedListMixin, CRUDMixin):
     queryset = Genres.objects.all()
     serializer_class = GenresSerializer
     permission_classes = (IsAdminOrReadOnly,)
@@ -151,50 +330,423 @@ class GenreViewSet(CRUDMixin):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+def edited_since(version, pub_date):
+    """`pub_date` годится для Last-Modified, только пока запись не правили."""
+    return pub_date if version == 1 else None
+
+
+class TitleViewSet(ConditionalGetMixin, CompiledListMixin,
+                   SparseFieldsViewMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.all()
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     filterset_class = TitleFilters
+    ordering_fields = ('rating', 'year', 'name')
+    pagination_class = TitlePagination
+    compiled_extra_columns = TitlePagination.keyset_class.ordering
+    sparse_columns = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating',),
+        'reviews_count': ('rating_count',),
+        'description': ('description',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+        'score_histogram': SCORE_FIELDS,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in (
+            'list', 'retrieve', 'top', 'export', 'similar', 'also_liked'
+        ):
+            return queryset
+        fields = self.get_sparse_fields()
+        if not histogram_requested(self.request):
+            fields = [name for name in fields if name != 'score_histogram']
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related(Prefetch(
+                'genre', queryset=Genres.objects.only('name', 'slug')
+            ))
+        return self.only_sparse_fields(queryset, fields)
+
+    def get_resource_version(self):
+        if self.action != 'retrieve' or included(self.request):
+            return None
+        versions = Title.objects.filter(
+            pk=self.kwargs.get('pk')
+        ).values_list('version', flat=True)
+        for version in versions:
+            return version, None
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        """`?include=reviews[,comments]` встраивает последние отзывы."""
+        response = super().retrieve(request, *args, **kwargs)
+        if 'reviews' in included(request):
+            response.data['reviews'] = embed_reviews(
+                request, self.kwargs['pk']
+            )
+        return response
+
+    def get_catalog_result(self):
+        """Выборка из in-memory каталога, если он включён и справится."""
+        engine = get_engine()
+        params = self.request.query_params
+        cursor = self.pagination_class.keyset_class.cursor_query_param
+        if engine is None or cursor in params:
+            return None
+        filterset = self.filterset_class(params, queryset=Title.objects.none())
+        if not filterset.is_valid():
+            return None
+        filters = {
+            name: value for name, value in filterset.form.cleaned_data.items()
+            if value not in (None, '', [])
+        }
+        if {'name', 'search'} & set(filters):
+            return None
+        ordering = params.get(api_settings.ORDERING_PARAM) or 'name'
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return None
+        return engine.query(
+            queryset=self.get_queryset(), ordering=ordering, **filters
+        )
+
+    def list(self, request, *args, **kwargs):
+        result = self.get_catalog_result()
+        if result is None:
+            return super().list(request, *args, **kwargs)
+        compiled = self.get_compiled_serializer()
+        if compiled is not None:
+            result.queryset = compiled.values(result.queryset)
+        page = self.paginate_queryset(result)
+        if compiled is not None:
+            return self.get_paginated_response(compiled.represent(page))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def get_serializer_class(self):
         if self.action in ['create', 'partial_update']:
             return TitleCRUDSerializer
         return TitleSerializer
 
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        """Создаёт пачку произведений одним запросом.
+
+        Некорректные элементы пропускаются, ошибки возвращаются по их
+        индексам в теле запроса.
+        """
+        max_size = getattr(settings, 'TITLE_BULK_MAX_SIZE', 10000)
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError('Ожидается непустой список произведений.')
+        if len(request.data) > max_size:
+            raise ValidationError(
+                f'Не больше {max_size} произведений за запрос.'
+            )
+        items, errors = validate_bulk_titles(request.data)
+        ids = create_titles([fields for _, fields in items])
+        cache.invalidate(Title._meta.label_lower)
+        data = {
+            'created': [
+                {'index': index, 'id': pk}
+                for (index, _), pk in zip(items, ids)
+            ],
+            'errors': [
+                {'index': index, 'errors': errors[index]}
+                for index in sorted(errors)
+            ],
+        }
+        if not ids:
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(methods=['get'], detail=False)
+    def export(self, request):
+        """Весь каталог в NDJSON: по произведению на строку, в порядке id.
+
+        Произведения читаются пачками по условию `id > последний`, так что
+        память не зависит от размера каталога. `?after=<id>` продолжает
+        прерванную выгрузку после указанного произведения.
+        """
+        try:
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            raise ValidationError({'after': 'Ожидается id произведения.'})
+        return StreamingHttpResponse(
+            self.export_lines(after), content_type='application/x-ndjson'
+        )
+
+    def export_lines(self, after):
+        chunk_size = getattr(settings, 'TITLE_EXPORT_CHUNK_SIZE', 1000)
+        compiled = self.get_compiled_serializer()
+        queryset = self.get_queryset().order_by('pk')
+        while True:
+            chunk = queryset.filter(pk__gt=after)[:chunk_size]
+            if compiled is not None:
+                rows = list(compiled.values(chunk))
+                data = compiled.represent(rows)
+            else:
+                titles = list(chunk)
+                rows = [{'id': title.pk} for title in titles]
+                data = self.get_serializer(titles, many=True).data
+            if not rows:
+                return
+            after = rows[-1]['id']
+            for item in data:
+                yield json.dumps(
+                    item, cls=JSONEncoder, ensure_ascii=False
+                ) + '\n'
+
+    @action(methods=['get'], detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения из предрасчитанного индекса.
+
+        Не больше `SIMILAR_MAX_SIZE` позиций, с похожестью в поле
+        `similarity`.
+        """
+        get_object_or_404(Title.objects.only('pk'), pk=pk)
+        return Response(self.ranked_titles(
+            neighbour_ids(
+                TitleNeighbour.SIMILAR, pk, self.get_limit(SIMILAR_MAX_SIZE)
+            ),
+            'similarity'
+        ))
+
+    @action(methods=['get'], detail=True, url_path='also-liked')
+    def also_liked(self, request, pk=None):
+        """Произведения, которые высоко оценили читатели этого.
+
+        Индекс обновляет команда `update_also_liked`.
+        """
+        get_object_or_404(Title.objects.only('pk'), pk=pk)
+        return Response(self.ranked_titles(
+            neighbour_ids(
+                TitleNeighbour.ALSO_LIKED, pk,
+                self.get_limit(SIMILAR_MAX_SIZE)
+            ),
+            'similarity'
+        ))
+
+    def get_limit(self, default):
+        return query_limit(self.request, default)
+
+    def ranked_titles(self, entries, score_field):
+        """Представления произведений из пар `(id, оценка)`."""
+        titles = self.get_queryset().in_bulk(
+            [title_id for title_id, _ in entries]
+        )
+        data = []
+        for title_id, score in entries:
+            item = self.get_serializer(titles[title_id]).data
+            item[score_field] = round(score, 3)
+            data.append(item)
+        return data
+
+    @action(methods=['get'], detail=True)
+    def histogram(self, request, pk=None):
+        """Распределение оценок произведения от 1 до 10."""
+        title = get_object_or_404(Title.objects.only(*SCORE_FIELDS), pk=pk)
+        return Response({'score_histogram': title.score_histogram})
+
+    @action(methods=['get'], detail=False)
+    def top(self, request):
+        """Лучшие произведения по байесовской оценке.
+
+        Общая таблица или таблица категории/жанра (`?category=<slug>`,
+        `?genre=<slug>`), не больше `leaderboards.MAX_SIZE` позиций.
+        """
+        board = leaderboards.GLOBAL_BOARD
+        if 'category' in request.query_params:
+            category = get_object_or_404(
+                Categories, slug=request.query_params['category']
+            )
+            board = leaderboards.category_board(category.pk)
+        elif 'genre' in request.query_params:
+            genre = get_object_or_404(
+                Genres, slug=request.query_params['genre']
+            )
+            board = leaderboards.genre_board(genre.pk)
+        entries = leaderboards.top_title_ids(
+            board, self.get_limit(leaderboards.MAX_SIZE)
+        )
+        return Response(self.ranked_titles(entries, 'score'))
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, NestedParentMixin,
+                     CompiledListMixin, SparseFieldsViewMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorOrAdminOrModerator,)
+    parent_queryset = Review.objects.all()
+    parent_field = 'review'
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    pagination_class = PubDatePagination
+    compiled_extra_columns = PubDatePagination.keyset_class.ordering
+    sparse_columns = {
+        'id': ('id',),
+        'review': ('review__text',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+    }
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id'))
-        return review.comments.all()
+        if self.detail:
+            queryset = Comment.objects.filter(**self.parent_filter())
+        else:
+            queryset = self.parent.comments.order_by('pub_date', 'id')
+        fields = self.get_sparse_fields()
+        return self.only_sparse_fields(queryset.select_related(*(
+            name for name in ('review', 'author') if name in fields
+        )), fields)
+
+    def get_resource_version(self):
+        """Комментарии выводят текст отзыва, поэтому в ETag его версия."""
+        if self.action == 'list':
+            review = self.parent
+            return f'{review.comments_version}.{review.version}', None
+        elif self.action == 'retrieve':
+            rows = Comment.objects.filter(
+                pk=self.kwargs.get('pk'), **self.parent_filter()
+            ).values_list('version', 'review__version', 'pub_date')
+            for version, review_version, pub_date in rows:
+                return (
+                    f'{version}.{review_version}',
+                    edited_since(version, pub_date)
+                )
+        return None
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id')
-        )
-        serializer.save(author=self.request.user, review=review)
+        """Счётчик комментариев отзыва меняется в той же транзакции."""
+        with transaction.atomic():
+            serializer.save(author=self.request.user, review=self.parent)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+DUPLICATE_REVIEW = 'Может существовать только один отзыв!'
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedParentMixin,
+                    CompiledListMixin, SparseFieldsViewMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorOrAdminOrModerator,)
+    parent_queryset = Title.objects.all()
+    parent_field = 'title'
+    parent_lookups = {'pk': 'title_id'}
+    pagination_class = PubDatePagination
+    compiled_extra_columns = PubDatePagination.keyset_class.ordering
+    sparse_columns = {
+        'id': ('id',),
+        'title': ('title__name',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comments_count': ('comments_count',),
+    }
 
     def get_queryset(self):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id')
-        )
-        return title.reviews.all()
+        if self.detail:
+            queryset = Review.objects.filter(**self.parent_filter())
+        else:
+            queryset = self.parent.reviews.order_by('pub_date', 'id')
+        fields = self.get_sparse_fields()
+        return self.only_sparse_fields(queryset.select_related(*(
+            name for name in ('title', 'author') if name in fields
+        )), fields)
+
+    def represent_rows(self, compiled, rows):
+        """`?include=comments` встраивает последние комментарии."""
+        rows = list(rows)
+        data = super().represent_rows(compiled, rows)
+        if 'comments' in included(self.request):
+            embed_comments(self.request, [
+                (row['id'], item) for row, item in zip(rows, data)
+            ])
+        return data
+
+    def get_resource_version(self):
+        """Отзывы выводят название произведения: в ETag его версия."""
+        if included(self.request):
+            return None
+        if self.action == 'list':
+            return self.parent.reviews_version, None
+        elif self.action == 'retrieve':
+            rows = Review.objects.filter(
+                pk=self.kwargs.get('pk'), **self.parent_filter()
+            ).values_list('version', 'title__version', 'pub_date')
+            for version, title_version, pub_date in rows:
+                return (
+                    f'{version}.{title_version}',
+                    edited_since(version, pub_date)
+                )
+        return None
 
     def perform_create(self, serializer):
-        title = get_object_or_404(
-            Title,
-            id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        """Повторный отзыв отсекает ограничение `unique review` в БД.
+
+        Рейтинг произведения обновляется сигналом в той же транзакции.
+        """
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=self.parent)
+        except IntegrityError:
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW]}
+            )
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        """Отзыв, его комментарии и рейтинг удаляются в одной транзакции."""
+        with transaction.atomic():
+            instance.delete()
+
+    def save_mine(self, review, lookup):
+        serializer = self.get_serializer(review, data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            serializer.save(**lookup)
+        return serializer
+
+    @action(
+        methods=['get', 'put'],
+        detail=False,
+        permission_classes=(IsAuthenticated,)
+    )
+    def mine(self, request, title_id=None):
+        """Свой отзыв на произведение: GET - прочитать, PUT - upsert.
+
+        Если отзыва не было, PUT его создаёт (201), иначе заменяет (200).
+        Когда параллельный запрос успел создать отзыв первым, вставка
+        упирается в `unique review`, и отзыв заменяется.
+        """
+        lookup = {'author': request.user, 'title': self.parent}
+        review = Review.objects.filter(**lookup).first()
+        if request.method == 'GET':
+            if review is None:
+                raise NotFound('Отзыв ещё не написан.')
+            return Response(self.get_serializer(review).data)
+        try:
+            serializer = self.save_mine(review, lookup)
+        except IntegrityError:
+            if review is not None:
+                raise
+            review = Review.objects.get(**lookup)
+            serializer = self.save_mine(review, lookup)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if review is None
+            else status.HTTP_200_OK
+        )
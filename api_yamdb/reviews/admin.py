@@ -2,7 +2,8 @@
 
 from django.contrib import admin
 
-from .models import Categories, Comment, Genres, Review, Title, TitleGenres
+from .models import (SCORE_FIELDS, Categories, Comment, Genres, Review, Title,
+                     TitleGenres)
 
 
 @admin.register(Categories)
@@ -28,6 +29,7 @@ class TitleAdmin(admin.ModelAdmin):
     list_display = ('name', 'year', 'description', 'category', 'get_genre',)
     search_fields = ('name', 'year', 'category',)
     list_filter = ('name', 'year', 'category',)
+    readonly_fields = ('rating_sum', 'rating_count', 'rating', *SCORE_FIELDS)
     empty_value_display = '-пусто-'
 
     def get_genre(self, object):
@@ -0,0 +1,249 @@
+"""«Тем, кому понравилось это, понравилось и…» по оценкам отзывов.
+
+Item-item коллаборативная фильтрация. Оценки центрируются средней
+оценкой пользователя, похожесть пары произведений - косинус
+центрированных оценок по общим читателям, умноженный на
+`n / (n + SHRINKAGE)` для `n` общих читателей, чтобы пары с одним
+общим читателем не выходили вперёд. В `TitleNeighbour` хранятся только
+положительные похожести, не больше `K` на произведение.
+
+Произведения обрабатываются блоками по `BLOCK_SIZE`. Для блока в
+память читаются только оценки его читателей - разреженная матрица в
+компактных массивах, строками по пользователям и столбцами по
+произведениям. Нормы столбцов всех произведений считаются заранее одним
+потоковым проходом по отзывам: в памяти - по числу на произведение и
+отзывы одного автора. От пользователя берутся последние
+`MAX_USER_REVIEWS` отзывов, иначе вклад одного читателя растёт
+квадратично; этим же ограничена строка матрицы.
+
+`update()` пересчитывает только произведения авторов отзывов,
+появившихся после прошлого запуска (`RecommenderState`), и списки, где
+они были, и предлагает их в списки остальных соседей; `rebuild()`
+перестраивает индекс целиком.
+"""
+
+import math
+from array import array
+from collections import defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import RecommenderState, Review, TitleNeighbour
+from .similar import offer_many, push_best, ranked
+
+K = 20
+SHRINKAGE = 5
+BLOCK_SIZE = 1000
+MAX_USER_REVIEWS = 500
+ALSO_LIKED = TitleNeighbour.ALSO_LIKED
+
+
+def _capped_rows(rows):
+    """Последние `MAX_USER_REVIEWS` оценок каждого автора.
+
+    `rows` - `(автор, произведение, оценка)` по автору и убыванию id
+    отзыва; отброшенные строки не задерживаются в памяти.
+    """
+    for author_id, group in groupby(rows, key=itemgetter(0)):
+        yield author_id, [
+            (title_id, score)
+            for _, title_id, score in islice(group, MAX_USER_REVIEWS)
+        ]
+
+
+def _reviews(last_review_id):
+    return Review.objects.filter(pk__lte=last_review_id).order_by(
+        'author_id', '-pk'
+    ).values_list('author_id', 'title_id', 'score')
+
+
+def load_norms(last_review_id):
+    """Нормы центрированных столбцов: id произведения -> норма."""
+    squares = defaultdict(float)
+    for _, rated in _capped_rows(_reviews(last_review_id).iterator()):
+        mean = sum(score for _, score in rated) / len(rated)
+        for title_id, score in rated:
+            squares[title_id] += (score - mean) ** 2
+    return {
+        title_id: math.sqrt(square) for title_id, square in squares.items()
+    }
+
+
+class ScoreMatrix:
+    """Центрированные оценки по пользователям и по произведениям."""
+
+    def __init__(self, norms):
+        self.by_user = {}
+        self.by_title = {}
+        self.norms = norms
+
+    @classmethod
+    def load(cls, title_ids, last_review_id, norms):
+        """Оценки читателей `title_ids` из отзывов с id до `last_review_id`.
+
+        Этого достаточно для похожестей этих произведений на любые
+        другие: столбцы `title_ids` полны, а нормы остальных берутся из
+        `norms` (см. `load_norms`).
+        """
+        matrix = cls(norms)
+        readers = Review.objects.filter(
+            title_id__in=title_ids, pk__lte=last_review_id
+        ).values('author_id')
+        rows = _reviews(last_review_id).filter(author_id__in=readers)
+        for author_id, rated in _capped_rows(rows.iterator()):
+            mean = sum(score for _, score in rated) / len(rated)
+            titles = array('q', (title_id for title_id, _ in rated))
+            scores = array('d', (score - mean for _, score in rated))
+            matrix.by_user[author_id] = titles, scores
+            for title_id, score in zip(titles, scores):
+                users, centered = matrix.by_title.setdefault(
+                    title_id, (array('q'), array('d'))
+                )
+                users.append(author_id)
+                centered.append(score)
+        return matrix
+
+    def scores(self, title_id):
+        """Положительные похожести на все произведения с общими читателями.
+
+        Пары `(id, похожесть)`.
+        """
+        norm = self.norms.get(title_id)
+        if not norm:
+            return
+        dots = defaultdict(float)
+        support = defaultdict(int)
+        users, centered = self.by_title[title_id]
+        for author_id, score in zip(users, centered):
+            if not score:
+                continue
+            titles, scores = self.by_user[author_id]
+            for other, other_score in zip(titles, scores):
+                dots[other] += score * other_score
+                support[other] += 1
+        for other, dot in dots.items():
+            if other == title_id or dot <= 0:
+                continue
+            shared = support[other]
+            yield other, (
+                dot / (norm * self.norms[other])
+                * shared / (shared + SHRINKAGE)
+            )
+
+    def neighbours(self, title_id, limit=K):
+        """Лучшие соседи произведения: пары `(id, похожесть)`."""
+        best = []
+        for other, score in self.scores(title_id):
+            push_best(best, score, other, limit)
+        return ranked(best)
+
+
+def _write(title_ids, last_review_id, norms, offer_to_others=False):
+    """Пересчитывает и записывает соседей произведений блоками.
+
+    Матрица оценок загружается на каждый блок заново (`ScoreMatrix.load`).
+    С `offer_to_others` произведения ещё и предлагаются в списки всех
+    непересчитываемых произведений с положительной похожестью: списки
+    несимметричны, и оно может войти в чужой список, не имея того в
+    своём.
+    """
+    created = 0
+    title_ids = list(title_ids)
+    recomputed = set(title_ids) if offer_to_others else None
+    for start in range(0, len(title_ids), BLOCK_SIZE):
+        created += _write_block(
+            title_ids[start:start + BLOCK_SIZE], last_review_id, norms,
+            recomputed
+        )
+    return created
+
+
+def _write_block(block, last_review_id, norms, recomputed=None):
+    """Один блок `_write`: матрица блока живёт только в этом вызове."""
+    matrix = ScoreMatrix.load(block, last_review_id, norms)
+    rows = []
+    offers = {}
+    for title_id in block:
+        scores = list(matrix.scores(title_id))
+        best = []
+        for neighbour_id, score in scores:
+            push_best(best, score, neighbour_id, K)
+        rows.extend(
+            TitleNeighbour(
+                kind=ALSO_LIKED, title_id=title_id,
+                neighbour_id=neighbour_id, score=score
+            )
+            for neighbour_id, score in ranked(best)
+        )
+        if recomputed is not None:
+            for pk, score in scores:
+                if pk not in recomputed:
+                    offers.setdefault(pk, []).append((title_id, score))
+    with transaction.atomic():
+        TitleNeighbour.objects.filter(
+            kind=ALSO_LIKED, title_id__in=block
+        ).delete()
+        TitleNeighbour.objects.bulk_create(rows)
+        offer_many(ALSO_LIKED, offers, K)
+    return len(rows)
+
+
+def _save_state(state, last_review_id):
+    state.last_review_id = max(state.last_review_id, last_review_id)
+    state.save()
+
+
+def _last_review_id():
+    return Review.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def rebuild():
+    """Пересчитывает соседей всех произведений.
+
+    Возвращает число записанных соседей.
+    """
+    last_review_id = _last_review_id()
+    norms = load_norms(last_review_id)
+    state, _ = RecommenderState.objects.get_or_create(name=ALSO_LIKED)
+    TitleNeighbour.objects.filter(kind=ALSO_LIKED).delete()
+    created = _write(sorted(norms), last_review_id, norms)
+    _save_state(state, last_review_id)
+    return created
+
+
+def update():
+    """Пересчитывает произведения авторов отзывов после прошлого запуска.
+
+    Отзывы берутся до одного id, прочитанного в начале: и выбор
+    произведений, и оценки ограничены им, поэтому отзыв, созданный во
+    время расчёта, попадёт в следующий запуск. Списки, где были
+    пересчитываемые произведения, тоже пересчитываются целиком, а в
+    остальные произведения только предлагаются. Без прошлого запуска
+    индекс перестраивается целиком. Возвращает число записанных соседей.
+    """
+    state = RecommenderState.objects.filter(name=ALSO_LIKED).first()
+    if state is None:
+        return rebuild()
+    last_review_id = _last_review_id()
+    # Новый отзыв сдвигает среднюю оценку автора, а с ней центрированные
+    # оценки всех его произведений.
+    authors = Review.objects.filter(
+        pk__gt=state.last_review_id, pk__lte=last_review_id
+    ).values('author_id')
+    title_ids = set(Review.objects.filter(
+        author_id__in=authors, pk__lte=last_review_id
+    ).values_list('title_id', flat=True))
+    if not title_ids:
+        return 0
+    title_ids |= set(TitleNeighbour.objects.filter(
+        kind=ALSO_LIKED, neighbour_id__in=title_ids
+    ).values_list('title_id', flat=True))
+    norms = load_norms(last_review_id)
+    created = _write(
+        sorted(title_ids), last_review_id, norms, offer_to_others=True
+    )
+    _save_state(state, last_review_id)
+    return created
@@ -0,0 +1,55 @@
+"""Массовое создание произведений.
+
+Произведения и их связи с жанрами вставляются пачками `bulk_create`
+в одной транзакции. `bulk_create` не отправляет сигналы, поэтому
+поисковый индекс, каталог и индекс похожих обновляются здесь же.
+"""
+
+from functools import partial
+
+from django.db import connection, transaction
+
+from . import catalog, search, similar
+from .models import Title, TitleGenres
+
+BATCH_SIZE = 500
+
+
+def _created_ids(titles):
+    """Первичные ключи только что вставленных произведений.
+
+    SQLite в Django 3.2 не возвращает id из `bulk_create`. Внутри
+    транзакции с записью других писателей нет, а AUTOINCREMENT выдаёт
+    id по возрастанию, поэтому это последние `len(titles)` строк.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [title.pk for title in titles]
+    ids = Title.objects.order_by('-pk').values_list('pk', flat=True)
+    return list(reversed(ids[:len(titles)]))
+
+
+def create_titles(items, batch_size=BATCH_SIZE):
+    """Создаёт произведения из пар `(поля Title, id жанров)`.
+
+    Возвращает id созданных произведений в порядке `items`.
+    """
+    if not items:
+        return []
+    titles = [Title(**fields) for fields, _ in items]
+    with transaction.atomic():
+        Title.objects.bulk_create(titles, batch_size=batch_size)
+        ids = _created_ids(titles)
+        for title, pk in zip(titles, ids):
+            title.pk = pk
+        TitleGenres.objects.bulk_create(
+            [
+                TitleGenres(title_id=pk, genre_id=genre_id)
+                for pk, (_, genre_ids) in zip(ids, items)
+                for genre_id in genre_ids
+            ],
+            batch_size=batch_size
+        )
+        search.index_titles(titles)
+        catalog.title_changed(*ids)
+        transaction.on_commit(partial(similar.titles_added, *ids))
+    return ids
@@ -0,0 +1,490 @@
+"""In-memory колоночный индекс каталога произведений.
+
+Каждое произведение занимает позицию в компактных массивах (id, год,
+категория, рейтинг), а для жанров, категорий и годов хранятся битовые
+маски позиций. Фильтрация сводится к побитовым операциям над масками,
+сортировка - к обходу заранее отсортированного массива позиций.
+
+Индекс необязателен и включается настройкой `TITLE_CATALOG_ENGINE`.
+Изменения приходят через сигналы моделей: после коммита транзакции
+затронутые произведения помечаются «грязными» и перечитываются одним
+запросом перед следующей выборкой. Каждый процесс держит свою копию,
+поэтому индекс дополнительно перестраивается целиком раз в
+`TITLE_CATALOG_MAX_AGE` секунд - в фоновом потоке: пока строится новая
+копия, запросы обслуживает прежняя, затем копии подменяются.
+"""
+
+import math
+import threading
+import time
+from array import array
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+def _bitset(positions, size):
+    """Маска из списка позиций, собранная в bytearray за один проход.
+
+    `mask |= 1 << position` копирует растущее целое на каждой позиции,
+    то есть загрузка квадратична по размеру каталога.
+    """
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class CatalogResult:
+    """Отфильтрованная и отсортированная выборка id произведений.
+
+    Ведёт себя как последовательность для `LimitOffsetPagination`:
+    `count()` не обращается к БД, срез загружает из `queryset` только
+    произведения страницы по первичному ключу.
+    """
+
+    def __init__(self, engine, mask, ordering, queryset=None):
+        self.engine = engine
+        self.mask = mask
+        self.ordering = ordering
+        self.queryset = queryset
+
+    def count(self):
+        return bin(self.mask).count('1')
+
+    def __len__(self):
+        return self.count()
+
+    def ids(self, start, stop=None):
+        if stop is None:
+            stop = self.count()
+        return self.engine.page_ids(self.mask, self.ordering, start, stop)
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError('CatalogResult supports only slicing.')
+        ids = self.ids(item.start or 0, item.stop)
+        objects = {
+            row['id'] if isinstance(row, dict) else row.pk: row
+            for row in self.queryset.filter(pk__in=ids)
+        }
+        return [objects[pk] for pk in ids if pk in objects]
+
+
+class CatalogEngine:
+    # Не входят в данные индекса и не подменяются при перезагрузке.
+    own_fields = ('_lock', '_dirty_titles', '_taxonomy_dirty', 'reloader')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded_at = None
+        self._dirty_titles = set()
+        self._taxonomy_dirty = False
+        self.reloader = None
+        self._reset()
+
+    def _reset(self):
+        self.ids = array('q')
+        self.years = array('l')
+        self.categories = array('q')
+        self.ratings = array('d')
+        self.names = []
+        self.genres = []
+        self.positions = {}
+        self.alive = 0
+        self.year_bits = {}
+        self.category_bits = {}
+        self.genre_bits = {}
+        self.category_slugs = {}
+        self.genre_slugs = {}
+        self._orders = {}
+
+    @property
+    def is_loaded(self):
+        return self.loaded_at is not None
+
+    def is_stale(self):
+        max_age = getattr(settings, 'TITLE_CATALOG_MAX_AGE', 300)
+        return (
+            not self.is_loaded
+            or time.monotonic() - self.loaded_at > max_age
+        )
+
+    def load(self):
+        """Перестраивает индекс из БД целиком.
+
+        Новая копия строится без блокировки и подменяет текущую. Пометки
+        об изменениях, пришедшие за это время, сохраняются: такие
+        произведения перечитываются ещё раз при следующей выборке.
+        """
+        fresh = CatalogEngine()
+        fresh._fill()
+        with self._lock:
+            for name, value in vars(fresh).items():
+                if name not in self.own_fields:
+                    setattr(self, name, value)
+
+    def reload_in_background(self):
+        """Запускает `load()` в потоке, если он ещё не запущен."""
+        with self._lock:
+            if self.reloader is not None and self.reloader.is_alive():
+                return
+            self.reloader = threading.Thread(target=self._reload, daemon=True)
+            self.reloader.start()
+
+    def _reload(self):
+        try:
+            self.load()
+        finally:
+            connection.close()
+
+    def _fill(self):
+        from .models import Title, TitleGenres
+
+        self._load_taxonomy()
+        years, categories, genres, title_genres = {}, {}, {}, {}
+        rows = Title.objects.order_by('pk').values_list(
+            'pk', 'name', 'year', 'category_id', 'rating'
+        )
+        for position, (pk, name, year, category_id, rating) in enumerate(
+            rows.iterator()
+        ):
+            self.ids.append(pk)
+            self.names.append(name)
+            self.years.append(year)
+            self.categories.append(category_id or 0)
+            self.ratings.append(math.nan if rating is None else rating)
+            self.positions[pk] = position
+            years.setdefault(year, []).append(position)
+            if category_id:
+                categories.setdefault(category_id, []).append(position)
+        links = TitleGenres.objects.values_list('title_id', 'genre_id')
+        for title_id, genre_id in links.iterator():
+            position = self.positions.get(title_id)
+            if position is None:
+                # Произведение создано после чтения таблицы.
+                continue
+            genres.setdefault(genre_id, []).append(position)
+            title_genres.setdefault(position, []).append(genre_id)
+        self.genres = [
+            tuple(title_genres.get(position, ()))
+            for position in range(len(self.ids))
+        ]
+        size = len(self.ids)
+        self.alive = (1 << size) - 1
+        for bits, groups in (
+            (self.year_bits, years),
+            (self.category_bits, categories),
+            (self.genre_bits, genres),
+        ):
+            for key, positions in groups.items():
+                bits[key] = _bitset(positions, size)
+        self.loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.loaded_at = None
+
+    def _load_taxonomy(self):
+        from .models import Categories, Genres
+
+        self.category_slugs = dict(
+            Categories.objects.values_list('slug', 'pk')
+        )
+        self.genre_slugs = dict(Genres.objects.values_list('slug', 'pk'))
+        self._taxonomy_dirty = False
+
+    def _append(self, pk, name, year, category_id, rating):
+        position = len(self.ids)
+        self.ids.append(pk)
+        self.years.append(year)
+        self.categories.append(category_id or 0)
+        self.ratings.append(math.nan if rating is None else rating)
+        self.names.append(name)
+        self.genres.append(())
+        self.positions[pk] = position
+        self.alive |= 1 << position
+        bit = 1 << position
+        self.year_bits[year] = self.year_bits.get(year, 0) | bit
+        if category_id:
+            self.category_bits[category_id] = (
+                self.category_bits.get(category_id, 0) | bit
+            )
+        for ordering in self._orders:
+            self._place(ordering, position)
+        return position
+
+    def _update(self, position, name, year, category_id, rating):
+        bit = 1 << position
+        old_year = self.years[position]
+        if old_year != year:
+            if old_year in self.year_bits:
+                self.year_bits[old_year] &= ~bit
+            self.year_bits[year] = self.year_bits.get(year, 0) | bit
+            self.years[position] = year
+            self._reorder('year', position)
+        old_category = self.categories[position]
+        category_id = category_id or 0
+        if old_category != category_id:
+            if old_category in self.category_bits:
+                self.category_bits[old_category] &= ~bit
+            if category_id:
+                self.category_bits[category_id] = (
+                    self.category_bits.get(category_id, 0) | bit
+                )
+            self.categories[position] = category_id
+        rating = math.nan if rating is None else rating
+        old_rating = self.ratings[position]
+        if not (old_rating == rating or (
+            math.isnan(old_rating) and math.isnan(rating)
+        )):
+            self.ratings[position] = rating
+            self._reorder('rating', position)
+        if self.names[position] != name:
+            self.names[position] = name
+            self._reorder('name', position)
+
+    def _link_genre(self, position, genre_id):
+        self.genre_bits[genre_id] = (
+            self.genre_bits.get(genre_id, 0) | 1 << position
+        )
+        self.genres[position] = self.genres[position] + (genre_id,)
+
+    def _set_genres(self, position, genre_ids):
+        bit = 1 << position
+        for genre_id in self.genres[position]:
+            self.genre_bits[genre_id] &= ~bit
+        self.genres[position] = ()
+        for genre_id in genre_ids:
+            self._link_genre(position, genre_id)
+
+    def _remove(self, position):
+        self.alive &= ~(1 << position)
+        self._set_genres(position, ())
+        del self.positions[self.ids[position]]
+
+    def _reorder(self, field, position):
+        """Переставляет позицию в готовых сортировках по полю `field`."""
+        for ordering in (field, f'-{field}'):
+            if ordering in self._orders:
+                self._place(ordering, position)
+
+    def _place(self, ordering, position):
+        """Вставляет позицию в готовую сортировку двоичным поиском.
+
+        Новая позиция добавляется, существующая переносится; ранги
+        обновляются только на сдвинутом участке, без полной сортировки.
+        """
+        order, rank = self._orders[ordering]
+        if position < len(rank):
+            start = rank[position]
+            del order[start]
+        else:
+            rank.append(0)
+            start = len(order)
+        key = self._sort_key(ordering)
+        value = key(position)
+        descending = ordering.startswith('-')
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            current = key(order[middle])
+            if current > value if descending else current < value:
+                low = middle + 1
+            else:
+                high = middle
+        order.insert(low, position)
+        for index in range(min(start, low), max(start, low) + 1):
+            if index < len(order):
+                rank[order[index]] = index
+
+    def mark_titles(self, title_ids):
+        with self._lock:
+            self._dirty_titles.update(title_ids)
+
+    def mark_taxonomy(self):
+        self._taxonomy_dirty = True
+
+    def refresh(self):
+        """Перечитывает изменившиеся произведения и справочники."""
+        from .models import Title, TitleGenres
+
+        with self._lock:
+            if self._taxonomy_dirty:
+                self._load_taxonomy()
+            if not self._dirty_titles:
+                return
+            dirty = self._dirty_titles
+            self._dirty_titles = set()
+            rows = Title.objects.filter(pk__in=dirty).values_list(
+                'pk', 'name', 'year', 'category_id', 'rating'
+            )
+            found = set()
+            for pk, *values in rows:
+                found.add(pk)
+                position = self.positions.get(pk)
+                if position is None:
+                    self._append(pk, *values)
+                else:
+                    self._update(position, *values)
+            links = {}
+            for title_id, genre_id in TitleGenres.objects.filter(
+                title_id__in=found
+            ).values_list('title_id', 'genre_id'):
+                links.setdefault(title_id, []).append(genre_id)
+            for pk in found:
+                self._set_genres(self.positions[pk], links.get(pk, ()))
+            for pk in dirty - found:
+                if pk in self.positions:
+                    self._remove(self.positions[pk])
+
+    def _match_slugs(self, slugs, value):
+        value = value.lower()
+        return [pk for slug, pk in slugs.items() if value in slug.lower()]
+
+    def _union(self, bits, keys):
+        mask = 0
+        for key in keys:
+            mask |= bits.get(key, 0)
+        return mask
+
+    def query(self, category=None, genre=None, genre__any=None,
+              genre__all=None, year=None, year_min=None, year_max=None,
+              year__in=None, ordering='name', queryset=None):
+        """Возвращает `CatalogResult` для фильтров из `TitleFilters`."""
+        with self._lock:
+            self.refresh()
+            mask = self.alive
+            if category:
+                mask &= self._union(self.category_bits, self._match_slugs(
+                    self.category_slugs, category
+                ))
+            if genre:
+                mask &= self._union(self.genre_bits, self._match_slugs(
+                    self.genre_slugs, genre
+                ))
+            if genre__any:
+                mask &= self._union(self.genre_bits, (
+                    self.genre_slugs.get(slug) for slug in genre__any
+                ))
+            for slug in genre__all or ():
+                mask &= self.genre_bits.get(self.genre_slugs.get(slug), 0)
+            if year is not None:
+                mask &= self.year_bits.get(int(year), 0)
+            if year__in:
+                mask &= self._union(
+                    self.year_bits, (int(value) for value in year__in)
+                )
+            if year_min is not None or year_max is not None:
+                low = -math.inf if year_min is None else year_min
+                high = math.inf if year_max is None else year_max
+                mask &= self._union(self.year_bits, (
+                    value for value in self.year_bits
+                    if low <= value <= high
+                ))
+            return CatalogResult(self, mask, ordering, queryset)
+
+    def _sort_key(self, ordering):
+        field = ordering.lstrip('-')
+        if field == 'rating':
+            # Как в SQLite: произведения без рейтинга идут первыми.
+            def key(position):
+                rating = self.ratings[position]
+                if math.isnan(rating):
+                    return (0, 0.0, self.ids[position])
+                return (1, rating, self.ids[position])
+        else:
+            column = self.names if field == 'name' else self.years
+
+            def key(position):
+                return (column[position], self.ids[position])
+        return key
+
+    def _order(self, ordering):
+        """Позиции в порядке сортировки и обратное отображение (ранги)."""
+        cached = self._orders.get(ordering)
+        if cached is not None:
+            return cached
+        order = array('l', sorted(
+            range(len(self.ids)), key=self._sort_key(ordering),
+            reverse=ordering.startswith('-')
+        ))
+        rank = array('l', bytes(order.itemsize * len(order)))
+        for index, position in enumerate(order):
+            rank[position] = index
+        self._orders[ordering] = order, rank
+        return order, rank
+
+    def page_ids(self, mask, ordering, start, stop):
+        with self._lock:
+            if not mask:
+                return []
+            bits = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+            order, rank = self._order(ordering)
+            if bin(mask).count('1') * 8 < len(order):
+                # Разреженная выборка: сортируем только попавшие позиции.
+                positions = [
+                    index << 3 | offset
+                    for index, byte in enumerate(bits) if byte
+                    for offset in range(8) if byte >> offset & 1
+                ]
+                positions.sort(key=rank.__getitem__)
+                return [self.ids[position] for position in positions[
+                    start:stop
+                ]]
+            ids = []
+            skipped = 0
+            size = len(bits) * 8
+            for position in order:
+                if position >= size or not bits[position >> 3] >> (
+                    position & 7
+                ) & 1:
+                    continue
+                if skipped < start:
+                    skipped += 1
+                    continue
+                ids.append(self.ids[position])
+                if len(ids) >= stop - start:
+                    break
+            return ids
+
+    def category_title_ids(self, category_id):
+        with self._lock:
+            mask = self.category_bits.get(category_id, 0)
+            return [
+                self.ids[position] for position in range(mask.bit_length())
+                if mask >> position & 1
+            ]
+
+
+engine = CatalogEngine()
+
+
+def get_engine():
+    """Возвращает загруженный индекс или None, если он выключен.
+
+    Первая загрузка в процессе идёт в запросе: отдавать ещё нечего.
+    Устаревший индекс продолжает отвечать, а новый строится в фоне.
+    """
+    if not getattr(settings, 'TITLE_CATALOG_ENGINE', False):
+        return None
+    if not engine.is_loaded:
+        with engine._lock:
+            if not engine.is_loaded:
+                engine.load()
+    elif engine.is_stale():
+        engine.reload_in_background()
+    return engine
+
+
+def title_changed(*title_ids):
+    """Помечает произведения для перечитывания после коммита."""
+    if engine.is_loaded:
+        transaction.on_commit(partial(engine.mark_titles, title_ids))
+
+
+def taxonomy_changed():
+    if engine.is_loaded:
+        transaction.on_commit(engine.mark_taxonomy)
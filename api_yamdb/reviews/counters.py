@@ -0,0 +1,71 @@
+"""Проверка и исправление денормализованных счётчиков.
+
+`Review.comments_count` и `Title.rating_count` (оно же число отзывов)
+поддерживаются сигналами F-выражениями. Записи в обход сигналов -
+`QuerySet.update()`, `bulk_create()`, правка БД вручную - могут их
+рассогласовать; здесь расхождения находятся одним запросом на модель
+и исправляются пакетно. Исправление меняет отдаваемые значения, поэтому
+вместе с ним меняются версии ответов (ETag) и обновляются производные
+структуры - как при записи через сигналы.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Review, Title, increment
+from .signals import TITLE_VERSIONS, title_changed
+
+BATCH_SIZE = 1000
+
+
+def _actual(model, relation):
+    """Подзапрос: число строк `model`, ссылающихся на внешнюю запись."""
+    return Coalesce(Subquery(
+        model.objects.filter(**{relation: OuterRef('pk')}).order_by()
+        .values(relation).annotate(total=Count('id')).values('total')
+    ), 0)
+
+
+def drifted_reviews():
+    """id отзывов, у которых `comments_count` не совпадает с фактом."""
+    return list(Review.objects.annotate(
+        actual=_actual(Comment, 'review')
+    ).exclude(comments_count=F('actual')).values_list('pk', flat=True))
+
+
+def drifted_titles():
+    """id произведений, у которых число оценок не совпадает с фактом."""
+    return list(Title.objects.annotate(
+        actual=_actual(Review, 'title')
+    ).exclude(rating_count=F('actual')).values_list('pk', flat=True))
+
+
+def repair_reviews(ids):
+    """Пересчитывает `comments_count` пакетами, значения - в самом UPDATE.
+
+    Счётчик виден в отзыве и в списке отзывов произведения - меняются
+    `Review.version` и `Title.reviews_version`.
+    """
+    for start in range(0, len(ids), BATCH_SIZE):
+        batch = ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            Review.objects.filter(pk__in=batch).update(
+                comments_count=_actual(Comment, 'review'),
+                **increment('version')
+            )
+            Title.objects.filter(reviews__pk__in=batch).update(
+                **increment('reviews_version')
+            )
+
+
+def repair_titles(ids):
+    """Пересчитывает рейтинг, число оценок и гистограмму с нуля.
+
+    Версии меняются тем же UPDATE; рейтинговые таблицы и каталог
+    обновляются, как после записи отзыва.
+    """
+    for title_id in ids:
+        with transaction.atomic():
+            Title.recalculate_rating(title_id, **increment(*TITLE_VERSIONS))
+            title_changed(title_id)
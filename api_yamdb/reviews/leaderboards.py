@@ -0,0 +1,102 @@
+"""Рейтинговые таблицы произведений с байесовским сглаживанием.
+
+Оценка произведения: (C * m + сумма оценок) / (C + число оценок), где
+m - априорная средняя оценка, C - её вес в «виртуальных» отзывах.
+Произведение с парой десяток не обгоняет проверенную тысячей отзывов
+девятку. Позиции хранятся в `LeaderboardEntry` и пересчитываются
+для одного произведения при изменении его отзывов, жанров или
+категории; таблицы целиком перестраивает команда
+`rebuild_leaderboards`.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import LeaderboardEntry, Title, TitleGenres
+
+GLOBAL_BOARD = 'all'
+MAX_SIZE = 100
+
+
+def category_board(category_id):
+    return f'category:{category_id}'
+
+
+def genre_board(genre_id):
+    return f'genre:{genre_id}'
+
+
+def bayesian_score(rating_sum, rating_count):
+    prior_mean = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 7.0)
+    prior_weight = getattr(settings, 'LEADERBOARD_PRIOR_WEIGHT', 10)
+    return (
+        (prior_weight * prior_mean + rating_sum)
+        / (prior_weight + rating_count)
+    )
+
+
+def _entries(title_id, category_id, genre_ids, rating_sum, rating_count):
+    if not rating_count:
+        return []
+    score = bayesian_score(rating_sum, rating_count)
+    boards = [GLOBAL_BOARD]
+    if category_id:
+        boards.append(category_board(category_id))
+    boards.extend(genre_board(genre_id) for genre_id in genre_ids)
+    return [
+        LeaderboardEntry(board=board, title_id=title_id, score=score)
+        for board in boards
+    ]
+
+
+def refresh_title(title_id):
+    """Пересчитывает позиции одного произведения во всех таблицах."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(title_id=title_id).delete()
+        row = Title.objects.filter(pk=title_id).values_list(
+            'category_id', 'rating_sum', 'rating_count'
+        ).first()
+        if row is None or not row[2]:
+            return
+        genre_ids = TitleGenres.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True)
+        LeaderboardEntry.objects.bulk_create(
+            _entries(title_id, row[0], genre_ids, row[1], row[2])
+        )
+
+
+def rebuild(batch_size=1000):
+    """Перестраивает все рейтинговые таблицы. Возвращает число позиций."""
+    genres = {}
+    for title_id, genre_id in TitleGenres.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator():
+        genres.setdefault(title_id, []).append(genre_id)
+    created = 0
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        batch = []
+        rows = Title.objects.filter(rating_count__gt=0).values_list(
+            'pk', 'category_id', 'rating_sum', 'rating_count'
+        )
+        for pk, category_id, rating_sum, rating_count in rows.iterator():
+            batch.extend(_entries(
+                pk, category_id, genres.get(pk, ()), rating_sum, rating_count
+            ))
+            if len(batch) >= batch_size:
+                LeaderboardEntry.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        LeaderboardEntry.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def top_title_ids(board, limit=MAX_SIZE):
+    """id и оценки лучших произведений таблицы - срез индекса."""
+    return list(
+        LeaderboardEntry.objects.filter(board=board).order_by(
+            '-score', 'title_id'
+        ).values_list('title_id', 'score')[:min(limit, MAX_SIZE)]
+    )
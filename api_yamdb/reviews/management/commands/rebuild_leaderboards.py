@@ -0,0 +1,16 @@
+"""Management-команда для перестройки рейтинговых таблиц."""
+
+from django.core.management.base import BaseCommand
+from reviews import leaderboards
+
+
+class Command(BaseCommand):
+    """Пересчитывает байесовские оценки всех произведений."""
+
+    help = 'Перестраивает рейтинговые таблицы произведений.'
+
+    def handle(self, *args, **options):
+        created = leaderboards.rebuild()
+        self.stdout.write(
+            f'Рейтинговые таблицы перестроены, позиций: {created}'
+        )
@@ -0,0 +1,16 @@
+"""Management-команда для перестройки индекса похожих произведений."""
+
+from django.core.management.base import BaseCommand
+from reviews import similar
+
+
+class Command(BaseCommand):
+    """Пересчитывает соседей всех произведений по жанрам."""
+
+    help = 'Перестраивает индекс похожих произведений.'
+
+    def handle(self, *args, **options):
+        created = similar.rebuild()
+        self.stdout.write(
+            f'Индекс похожих произведений перестроен, пар: {created}'
+        )
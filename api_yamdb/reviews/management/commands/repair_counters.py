@@ -0,0 +1,32 @@
+"""Management-команда для проверки денормализованных счётчиков."""
+
+from django.core.management.base import BaseCommand
+from reviews import counters
+
+
+class Command(BaseCommand):
+    """Сверяет счётчики комментариев и отзывов с таблицами."""
+
+    help = (
+        'Находит и исправляет расхождения comments_count у отзывов и '
+        'числа отзывов у произведений; с --check только сообщает о них.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить, ничего не исправляя.'
+        )
+
+    def handle(self, *args, **options):
+        reviews = counters.drifted_reviews()
+        titles = counters.drifted_titles()
+        if not options['check']:
+            counters.repair_reviews(reviews)
+            counters.repair_titles(titles)
+        action = 'найдено' if options['check'] else 'исправлено'
+        self.stdout.write(
+            f'Расхождений {action}: отзывов - {len(reviews)}, '
+            f'произведений - {len(titles)}'
+        )
@@ -0,0 +1,30 @@
+"""Management-команда для обучения модели персональных рекомендаций."""
+
+from django.core.management.base import BaseCommand
+from reviews import recommendations
+
+
+class Command(BaseCommand):
+    """Обучает факторизацию оценок и публикует файл модели."""
+
+    help = 'Обучает модель персональных рекомендаций по оценкам отзывов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rank', type=int, default=16)
+        parser.add_argument('--epochs', type=int, default=20)
+        parser.add_argument('--learning-rate', type=float, default=0.01)
+        parser.add_argument('--regularization', type=float, default=0.05)
+
+    def handle(self, *args, **options):
+        header, *arrays = recommendations.train(
+            rank=options['rank'],
+            epochs=options['epochs'],
+            learning_rate=options['learning_rate'],
+            regularization=options['regularization'],
+        )
+        path = recommendations.model_path()
+        recommendations.save(path, header, *arrays)
+        self.stdout.write(
+            f'Модель сохранена в {path}: произведений {header["items"]}, '
+            f'пользователей {header["users"]}'
+        )
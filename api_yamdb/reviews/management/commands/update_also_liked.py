@@ -0,0 +1,27 @@
+"""Management-команда для расчёта «понравилось и…» по оценкам."""
+
+from django.core.management.base import BaseCommand
+from reviews import also_liked
+
+
+class Command(BaseCommand):
+    """Обновляет соседей произведений по оценкам пользователей."""
+
+    help = (
+        'Пересчитывает похожесть произведений по оценкам для новых '
+        'отзывов; с --full - для всех произведений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Перестроить индекс целиком.'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            created = also_liked.rebuild()
+        else:
+            created = also_liked.update()
+        self.stdout.write(f'Записано соседей по оценкам: {created}')
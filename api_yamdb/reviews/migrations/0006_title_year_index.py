@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-18 16:45
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_name_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.PositiveIntegerField(db_index=True, validators=[django.core.validators.MaxValueValidator(2026, message='Год не может быть больше текущего!')], verbose_name='Год'),
+        ),
+    ]
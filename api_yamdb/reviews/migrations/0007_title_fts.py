@@ -0,0 +1,46 @@
+from django.db import migrations
+
+FTS_TABLE = 'reviews_title_fts'
+
+
+def normalize(text):
+    return (text or '').lower().replace('ё', 'е')
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Title = apps.get_model('reviews', 'Title')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            'USING fts5(name, description)'
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [
+                (pk, normalize(name), normalize(description))
+                for pk, name, description in Title.objects.values_list(
+                    'pk', 'name', 'description'
+                ).iterator()
+            ]
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_year_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2 on 2026-10-18 16:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleGenres = apps.get_model('reviews', 'TitleGenres')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    prior_mean = getattr(settings, 'LEADERBOARD_PRIOR_MEAN', 7.0)
+    prior_weight = getattr(settings, 'LEADERBOARD_PRIOR_WEIGHT', 10)
+    genres = {}
+    for title_id, genre_id in TitleGenres.objects.values_list(
+        'title_id', 'genre_id'
+    ):
+        genres.setdefault(title_id, []).append(genre_id)
+    entries = []
+    for pk, category_id, rating_sum, rating_count in Title.objects.filter(
+        rating_count__gt=0
+    ).values_list('pk', 'category_id', 'rating_sum', 'rating_count'):
+        score = (
+            (prior_weight * prior_mean + rating_sum)
+            / (prior_weight + rating_count)
+        )
+        boards = ['all'] + [f'genre:{genre}' for genre in genres.get(pk, ())]
+        if category_id:
+            boards.append(f'category:{category_id}')
+        entries.extend(
+            LeaderboardEntry(board=board, title_id=pk, score=score)
+            for board in boards
+        )
+    LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=64, verbose_name='Рейтинговая таблица')),
+                ('score', models.FloatField(verbose_name='Байесовская оценка')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Позиции в рейтинге',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', '-score', 'title'], name='leaderboard_board_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'title'), name='unique_leaderboard_entry'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
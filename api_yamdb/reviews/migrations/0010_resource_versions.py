@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='версия'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='comments_version',
+            field=models.PositiveIntegerField(default=1, verbose_name='версия списка комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='версия'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Версия списка отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Версия'),
+        ),
+    ]
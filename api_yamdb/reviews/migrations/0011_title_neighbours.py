@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 17:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_resource_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleNeighbour',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('similar', 'Похожие по жанрам'), ('also_liked', 'Нравятся тем же читателям')], max_length=16, verbose_name='Индекс')),
+                ('score', models.FloatField(verbose_name='Похожесть')),
+                ('neighbour', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.title', verbose_name='Сосед')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Похожее произведение',
+                'verbose_name_plural': 'Похожие произведения',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleneighbour',
+            index=models.Index(fields=['kind', 'title', '-score', 'neighbour'], name='title_neighbour_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='titleneighbour',
+            constraint=models.UniqueConstraint(fields=('kind', 'title', 'neighbour'), name='unique_title_neighbour'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_neighbours'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommenderState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True, verbose_name='Расчёт')),
+                ('last_review_id', models.PositiveIntegerField(default=0, verbose_name='Последний учтённый отзыв')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Время запуска')),
+            ],
+            options={
+                'verbose_name': 'Состояние расчёта рекомендаций',
+                'verbose_name_plural': 'Состояния расчётов рекомендаций',
+            },
+        ),
+    ]
@@ -4,7 +4,33 @@ from datetime import datetime
 
 from accounts.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast
+
+SCORE_FIELDS = tuple(f'score_{score}' for score in range(1, 11))
+
+
+def increment(*fields):
+    """Аргументы для `update()`: увеличить счётчики на единицу."""
+    return {field: models.F(field) + 1 for field in fields}
+
+
+class CounterFieldsMixin:
+    """Не перезаписывает счётчики при save() существующей записи.
+
+    Счётчики меняются только UPDATE с F-выражениями, а значения в
+    памяти экземпляра к моменту сохранения могут устареть.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
 
 
 class Categories(models.Model):
@@ -47,14 +73,19 @@ class Genres(models.Model):
         return f'{self.name}'
 
 
-class Title(models.Model):
+class Title(CounterFieldsMixin, models.Model):
     """Модель для произведений."""
+    counter_fields = (
+        'rating_sum', 'rating_count', 'rating', *SCORE_FIELDS,
+        'version', 'reviews_version',
+    )
     name = models.CharField(
         max_length=256,
         verbose_name='Название'
     )
     year = models.PositiveIntegerField(
         verbose_name='Год',
+        db_index=True,
         validators=[
             MaxValueValidator(
                 int(datetime.now().year),
@@ -79,6 +110,68 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Рейтинг'
+    )
+    score_1 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «1»'
+    )
+    score_2 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «2»'
+    )
+    score_3 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «3»'
+    )
+    score_4 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «4»'
+    )
+    score_5 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «5»'
+    )
+    score_6 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «6»'
+    )
+    score_7 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «7»'
+    )
+    score_8 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «8»'
+    )
+    score_9 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «9»'
+    )
+    score_10 = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Оценок «10»'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Версия'
+    )
+    reviews_version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Версия списка отзывов'
+    )
 
     class Meta:
         verbose_name = 'Произведение'
@@ -88,10 +181,108 @@ class Title(models.Model):
             models.UniqueConstraint(fields=['name', 'year', 'category'],
                                     name='unique_media')
         ]
+        indexes = [
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name}'
 
+    # Поля, от которых зависит индекс похожих произведений (кроме жанров).
+    SIMILARITY_FIELDS = ('category_id', 'year')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_similarity()
+        return instance
+
+    def remember_similarity(self):
+        """Запоминает значения `SIMILARITY_FIELDS`, если они загружены."""
+        if all(field in self.__dict__ for field in self.SIMILARITY_FIELDS):
+            self._loaded_similarity = tuple(
+                self.__dict__[field] for field in self.SIMILARITY_FIELDS
+            )
+        else:
+            self._loaded_similarity = None
+
+    def similarity_changed(self, update_fields=None):
+        """Изменились ли с загрузки категория или год."""
+        if update_fields is not None and not {
+            'category', 'category_id', 'year'
+        } & set(update_fields):
+            return False
+        loaded = getattr(self, '_loaded_similarity', None)
+        return loaded is None or loaded != tuple(
+            getattr(self, field) for field in self.SIMILARITY_FIELDS
+        )
+
+    @property
+    def score_histogram(self):
+        """Количество отзывов с оценками от 1 до 10."""
+        return [getattr(self, field) for field in SCORE_FIELDS]
+
+    @classmethod
+    def update_rating(cls, title_id, added=None, removed=None, **changes):
+        """Инкрементально пересчитывает рейтинг произведения.
+
+        `added` - оценка, которая появилась, `removed` - которая исчезла;
+        при изменении отзыва передаются обе. Сумма, количество, среднее
+        и гистограмма обновляются одним UPDATE, без агрегации по таблице
+        отзывов. `changes` - другие поля, которые меняются тем же UPDATE.
+        """
+        if added != removed:
+            changes.update(cls._rating_changes(added, removed))
+        if changes:
+            cls.objects.filter(pk=title_id).update(**changes)
+
+    @staticmethod
+    def _rating_changes(added, removed):
+        score_delta = (added or 0) - (removed or 0)
+        count_delta = (added is not None) - (removed is not None)
+        new_sum = models.F('rating_sum') + score_delta
+        new_count = models.F('rating_count') + count_delta
+        changes = {
+            'rating_sum': new_sum,
+            'rating_count': new_count,
+            'rating': models.Case(
+                models.When(
+                    models.Q(rating_count__lte=-count_delta),
+                    then=None
+                ),
+                default=Cast(new_sum, models.FloatField()) / new_count,
+                output_field=models.FloatField(),
+            ),
+        }
+        if added is not None:
+            changes[f'score_{added}'] = models.F(f'score_{added}') + 1
+        if removed is not None:
+            changes[f'score_{removed}'] = models.F(f'score_{removed}') - 1
+        return changes
+
+    @classmethod
+    def recalculate_rating(cls, title_id, **changes):
+        """Пересчитывает рейтинг и гистограмму по отзывам с нуля.
+
+        `changes` - другие поля, которые меняются тем же UPDATE.
+        """
+        histogram = dict.fromkeys(SCORE_FIELDS, 0)
+        for score, count in Review.objects.filter(
+            title_id=title_id
+        ).order_by().values_list('score').annotate(models.Count('id')):
+            histogram[f'score_{score}'] = count
+        rating_count = sum(histogram.values())
+        rating_sum = sum(
+            score * histogram[field]
+            for score, field in enumerate(SCORE_FIELDS, 1)
+        )
+        cls.objects.filter(pk=title_id).update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=rating_sum / rating_count if rating_count else None,
+            **histogram, **changes
+        )
+
 
 class TitleGenres(models.Model):
     """Вспомогательная таблица многое-ко-многим - произведения и жанры."""
@@ -113,7 +304,8 @@ class TitleGenres(models.Model):
         return f'{self.title}-{self.genre}'
 
 
-class Review(models.Model):
+class Review(CounterFieldsMixin, models.Model):
+    counter_fields = ('version', 'comments_version', 'comments_count')
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -142,6 +334,15 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    version = models.PositiveIntegerField('версия', default=1)
+    comments_version = models.PositiveIntegerField(
+        'версия списка комментариев',
+        default=1
+    )
+    comments_count = models.PositiveIntegerField(
+        'количество комментариев',
+        default=0
+    )
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -151,13 +352,35 @@ class Review(models.Model):
                 fields=('title', 'author', ),
                 name='unique review'
             )]
+        indexes = [
+            models.Index(
+                fields=['title', 'pub_date', 'id'],
+                name='review_title_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='review_author_date_idx'
+            ),
+        ]
         ordering = ('pub_date',)
 
     def __str__(self):
         return f'{self.text}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и рейтинг произведения в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-class Comment(models.Model):
+
+class Comment(CounterFieldsMixin, models.Model):
+    counter_fields = ('version',)
     review = models.ForeignKey(
         Review,
         on_delete=models.CASCADE,
@@ -179,10 +402,138 @@ class Comment(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    version = models.PositiveIntegerField('версия', default=1)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', 'pub_date', 'id'],
+                name='comment_review_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date', 'id'],
+                name='comment_author_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.author}, {self.pub_date}: {self.text}'
+
+
+class LeaderboardEntry(models.Model):
+    """Материализованная позиция произведения в рейтинговой таблице.
+
+    `board` - ключ таблицы: `all`, `category:<id>` или `genre:<id>`,
+    `score` - байесовская оценка произведения.
+    """
+    board = models.CharField(
+        max_length=64,
+        verbose_name='Рейтинговая таблица'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(verbose_name='Байесовская оценка')
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Позиции в рейтинге'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('board', 'title'),
+                name='unique_leaderboard_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['board', '-score', 'title'],
+                name='leaderboard_board_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.board}: {self.title_id} ({self.score:.2f})'
+
+
+class TitleNeighbour(models.Model):
+    """Предрасчитанный сосед произведения в одном из индексов похожести.
+
+    `kind` - индекс: похожие по жанрам, категории и году (`similar`)
+    или по оценкам пользователей (`also_liked`).
+    """
+    SIMILAR = 'similar'
+    ALSO_LIKED = 'also_liked'
+    KINDS = (
+        (SIMILAR, 'Похожие по жанрам'),
+        (ALSO_LIKED, 'Нравятся тем же читателям'),
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=KINDS,
+        verbose_name='Индекс'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='neighbours',
+        verbose_name='Произведение'
+    )
+    neighbour = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Сосед'
+    )
+    score = models.FloatField(verbose_name='Похожесть')
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'title', 'neighbour'),
+                name='unique_title_neighbour'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['kind', 'title', '-score', 'neighbour'],
+                name='title_neighbour_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}: {self.title_id} → {self.neighbour_id}'
+
+
+class RecommenderState(models.Model):
+    """Отметка последнего запуска офлайн-расчёта рекомендаций.
+
+    `last_review_id` - последний учтённый отзыв: следующий запуск
+    обновляет только произведения с более новыми отзывами.
+    """
+    name = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='Расчёт'
+    )
+    last_review_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний учтённый отзыв'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Время запуска'
+    )
+
+    class Meta:
+        verbose_name = 'Состояние расчёта рекомендаций'
+        verbose_name_plural = 'Состояния расчётов рекомендаций'
+
+    def __str__(self):
+        return f'{self.name}: {self.last_review_id}'
@@ -0,0 +1,223 @@
+"""Персональные рекомендации по матричной факторизации оценок.
+
+Модель: `оценка ≈ μ + b_u + b_i + p_u · q_i`, обучение - SGD по
+отзывам (команда `train_recommendations`). Модель сохраняется одним
+файлом: заголовок JSON и массивы float32/int64. Файл отображается в
+память только для чтения (`mmap`), поэтому все процессы сервера делят
+одни страницы, а публикация новой модели - атомарная замена файла.
+
+Произведения в файле лежат по убыванию числа отзывов; при запросе
+оцениваются первые `RECOMMENDER_CANDIDATES` из них, а рецензированные
+пользователем исключаются.
+"""
+
+import heapq
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from operator import mul
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .models import Review
+
+MAGIC = b'YMF1'
+ALIGNMENT = 8
+
+
+def train(rank=16, epochs=20, learning_rate=0.01, regularization=0.05,
+          seed=0):
+    """Обучает модель по всем отзывам.
+
+    Возвращает `(заголовок, id произведений, id пользователей,
+    параметры произведений, параметры пользователей)`; параметры - это
+    смещение и `rank` факторов подряд для каждой строки.
+    """
+    ratings = list(
+        Review.objects.values_list('author_id', 'title_id', 'score')
+    )
+    popularity = Review.objects.values('title_id').annotate(
+        reviews=Count('id')
+    ).order_by('-reviews', 'title_id').values_list('title_id', flat=True)
+    item_ids = list(popularity)
+    user_ids = sorted({author_id for author_id, _, _ in ratings})
+    items = {pk: row for row, pk in enumerate(item_ids)}
+    users = {pk: row for row, pk in enumerate(user_ids)}
+    generator = random.Random(seed)
+
+    def factors():
+        return [generator.gauss(0, 0.1) for _ in range(rank)]
+
+    item_bias = [0.0] * len(item_ids)
+    user_bias = [0.0] * len(user_ids)
+    item_factors = [factors() for _ in item_ids]
+    user_factors = [factors() for _ in user_ids]
+    mean = sum(score for _, _, score in ratings) / len(ratings) if (
+        ratings
+    ) else 0.0
+    samples = [
+        (users[author_id], items[title_id], score)
+        for author_id, title_id, score in ratings
+    ]
+    for _ in range(epochs):
+        generator.shuffle(samples)
+        for user, item, score in samples:
+            p, q = user_factors[user], item_factors[item]
+            error = score - (
+                mean + user_bias[user] + item_bias[item] + sum(map(mul, p, q))
+            )
+            user_bias[user] += learning_rate * (
+                error - regularization * user_bias[user]
+            )
+            item_bias[item] += learning_rate * (
+                error - regularization * item_bias[item]
+            )
+            for k in range(rank):
+                p_k, q_k = p[k], q[k]
+                p[k] += learning_rate * (error * q_k - regularization * p_k)
+                q[k] += learning_rate * (error * p_k - regularization * q_k)
+    header = {
+        'rank': rank,
+        'mean': mean,
+        'items': len(item_ids),
+        'users': len(user_ids),
+        'last_review_id': Review.objects.aggregate(
+            last=Max('pk')
+        )['last'] or 0,
+    }
+    return (
+        header,
+        array('q', item_ids),
+        array('q', user_ids),
+        array('f', (
+            value for bias, vector in zip(item_bias, item_factors)
+            for value in (bias, *vector)
+        )),
+        array('f', (
+            value for bias, vector in zip(user_bias, user_factors)
+            for value in (bias, *vector)
+        )),
+    )
+
+
+def _padding(size):
+    return -size % ALIGNMENT
+
+
+def save(path, header, *arrays):
+    """Записывает модель во временный файл и атомарно подменяет `path`."""
+    encoded = json.dumps(header).encode()
+    prefix = MAGIC + struct.pack('<I', len(encoded)) + encoded
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory)
+    with os.fdopen(handle, 'wb') as file:
+        file.write(prefix + bytes(_padding(len(prefix))))
+        for values in arrays:
+            data = values.tobytes()
+            file.write(data + bytes(_padding(len(data))))
+    os.replace(temporary, path)
+
+
+class FactorModel:
+    """Модель, отображённая в память только для чтения."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.identity = _identity(os.fstat(file.fileno()))
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:4]) != MAGIC:
+            raise ValueError(f'{path}: не файл модели рекомендаций.')
+        (length,) = struct.unpack('<I', view[4:8])
+        self.header = json.loads(bytes(view[8:8 + length]))
+        offset = 8 + length
+        offset += _padding(offset)
+        self.rank = self.header['rank']
+        width = self.rank + 1
+        sections = []
+        for code, count in (
+            ('q', self.header['items']), ('q', self.header['users']),
+            ('f', self.header['items'] * width),
+            ('f', self.header['users'] * width),
+        ):
+            size = count * struct.calcsize(code)
+            sections.append(view[offset:offset + size].cast(code))
+            offset += size + _padding(size)
+        self.item_ids, self.user_ids, self.items, self.users = sections
+
+    def user_vector(self, user_id):
+        row = bisect_left(self.user_ids, user_id)
+        if row >= len(self.user_ids) or self.user_ids[row] != user_id:
+            return None
+        width = self.rank + 1
+        return self.users[row * width:(row + 1) * width].tolist()
+
+    def recommend(self, user_id, exclude=(), limit=10, candidates=None):
+        """Пары `(id произведения, прогноз оценки)` или None для новичка."""
+        vector = self.user_vector(user_id)
+        if vector is None:
+            return None
+        bias, factors = self.header['mean'] + vector[0], vector[1:]
+        width = self.rank + 1
+        items = self.items
+        count = len(self.item_ids)
+        if candidates is not None:
+            count = min(count, candidates)
+        scored = (
+            (bias + items[row * width] + sum(map(
+                mul, factors, items[row * width + 1:(row + 1) * width]
+            )), title_id)
+            for row, title_id in enumerate(self.item_ids[:count])
+            if title_id not in exclude
+        )
+        return [
+            (title_id, score)
+            for score, title_id in heapq.nlargest(limit, scored)
+        ]
+
+
+_model = None
+_lock = threading.Lock()
+
+
+def _identity(stat):
+    """Новый файл модели - новый inode или время изменения."""
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def model_path():
+    return str(getattr(
+        settings, 'RECOMMENDER_MODEL_PATH', 'recommender/factors.bin'
+    ))
+
+
+def get_model():
+    """Загруженная модель или None; новая версия файла подхватывается."""
+    global _model
+    path = model_path()
+    try:
+        identity = _identity(os.stat(path))
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _model is None or _model.identity != identity:
+            _model = FactorModel(path)
+        return _model
+
+
+def recommend(user_id, exclude=(), limit=10):
+    model = get_model()
+    if model is None:
+        return None
+    return model.recommend(
+        user_id, exclude, limit,
+        getattr(settings, 'RECOMMENDER_CANDIDATES', 2000)
+    )
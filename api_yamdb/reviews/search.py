@@ -0,0 +1,90 @@
+"""Полнотекстовый поиск по произведениям (SQLite FTS5)."""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'reviews_title_fts'
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он хранится в индексе.
+
+    Регистр сбрасывается, `ё` заменяется на `е`, чтобы «Ёлка» находилась
+    по запросу «елка».
+    """
+    return (text or '').lower().replace('ё', 'е')
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """Строит MATCH-выражение: все слова запроса как префиксы (AND)."""
+    tokens = re.findall(r'\w+', normalize(text))
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def index_title(title):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, normalize(title.name), normalize(title.description)]
+        )
+
+
+def index_titles(titles):
+    """Добавляет в индекс новые произведения одним executemany."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [
+                (title.pk, normalize(title.name),
+                 normalize(title.description))
+                for title in titles
+            ]
+        )
+
+
+def unindex_title(title_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по запросу и сортирует по bm25.
+
+    Совпадение в названии весит больше, чем в описании. На других СУБД
+    поиск деградирует до `icontains` по каждому слову.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not is_available():
+        for token in re.findall(r'\w+', text):
+            queryset = queryset.filter(
+                Q(name__icontains=token) | Q(description__icontains=token)
+            )
+        return queryset
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = {table}.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': f'bm25({FTS_TABLE}, 10.0, 1.0)'},
+        order_by=['search_rank'],
+    )
@@ -0,0 +1,184 @@
+"""Сигналы приложения reviews."""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import catalog, leaderboards, search, similar
+from .models import (Categories, Comment, Genres, LeaderboardEntry, Review,
+                     Title, TitleGenres, increment)
+
+# Версии, от которых зависят ETag ответов API (см. api.mixins).
+TITLE_VERSIONS = ('version', 'reviews_version')
+
+
+def title_changed(*title_ids):
+    """Обновляет производные структуры после коммита транзакции.
+
+    До коммита каскадное удаление ещё может убрать само произведение.
+    """
+    catalog.title_changed(*title_ids)
+    for title_id in title_ids:
+        transaction.on_commit(partial(leaderboards.refresh_title, title_id))
+
+
+def bump_titles(*title_ids):
+    """Меняет версию произведений, если изменились связанные с ними данные."""
+    Title.objects.filter(pk__in=title_ids).update(**increment('version'))
+
+
+def similarity_changed(*title_ids):
+    """Жанры, категория или год влияют на индекс похожих произведений."""
+    similar.schedule_refresh(title_ids)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """Учитывает новую или изменённую оценку в рейтинге произведения."""
+    score = int(instance.score)
+    old_score = getattr(instance, '_loaded_score', None)
+    versions = increment(*TITLE_VERSIONS)
+    if created:
+        Title.update_rating(instance.title_id, added=score, **versions)
+    elif old_score is None:
+        # Отзыв сохранён без загрузки из БД: прежняя оценка неизвестна.
+        Title.recalculate_rating(instance.title_id)
+        Title.update_rating(instance.title_id, **versions)
+    else:
+        Title.update_rating(
+            instance.title_id, added=score, removed=old_score, **versions
+        )
+    if not created:
+        Review.objects.filter(pk=instance.pk).update(**increment('version'))
+    instance._loaded_score = score
+    title_changed(instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Убирает оценку удалённого отзыва из рейтинга произведения.
+
+    Срабатывает и при каскадном удалении отзывов вместе с автором
+    или произведением.
+    """
+    Title.update_rating(
+        instance.title_id, removed=int(instance.score),
+        **increment(*TITLE_VERSIONS)
+    )
+    title_changed(instance.title_id)
+
+
+def comments_count_changed(review_id, delta):
+    """Меняет счётчик комментариев отзыва и версии ответов, где он виден.
+
+    `comments_count` выводится в отзыве и в списке отзывов, поэтому
+    вместе с ним меняются `Review.version` и `Title.reviews_version`.
+    """
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta,
+        **increment('comments_version', 'version')
+    )
+    Title.objects.filter(reviews__pk=review_id).update(
+        **increment('reviews_version')
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        comments_count_changed(instance.review_id, 1)
+        return
+    Comment.objects.filter(pk=instance.pk).update(**increment('version'))
+    Review.objects.filter(pk=instance.review_id).update(
+        **increment('comments_version')
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Срабатывает и при каскадном удалении вместе с автором."""
+    comments_count_changed(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Обновляет запись произведения в поисковом индексе и каталоге.
+
+    Название выводится в отзывах, поэтому меняется и версия их списка.
+    """
+    if not created:
+        Title.objects.filter(pk=instance.pk).update(
+            **increment(*TITLE_VERSIONS)
+        )
+    title_changed(instance.pk)
+    if created or instance.similarity_changed(update_fields):
+        # Жанры меняются через m2m, их обрабатывают сигналы ниже.
+        similarity_changed(instance.pk)
+    instance.remember_similarity()
+    if update_fields and not {'name', 'description'} & set(update_fields):
+        return
+    search.index_title(instance)
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    """Каскад удалит произведение из чужих списков похожих - их дополнят."""
+    affected = similar.lists_containing(instance.pk)
+    if affected:
+        similar.schedule_refresh(list_ids=affected)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    search.unindex_title(instance.pk)
+    title_changed(instance.pk)
+
+
+@receiver(post_save, sender=TitleGenres)
+@receiver(post_delete, sender=TitleGenres)
+def title_genre_changed(sender, instance, **kwargs):
+    bump_titles(instance.title_id)
+    title_changed(instance.title_id)
+    similarity_changed(instance.title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    """Жанры меняются через `Title.genre.set()` без post_save связей."""
+    if not reverse:
+        if action.startswith('post_'):
+            title_ids = (instance.pk,)
+        else:
+            return
+    elif action == 'pre_clear':
+        title_ids = tuple(instance.titles.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        title_ids = tuple(pk_set)
+    else:
+        return
+    bump_titles(*title_ids)
+    title_changed(*title_ids)
+    similarity_changed(*title_ids)
+
+
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+@receiver(post_save, sender=Genres)
+@receiver(post_delete, sender=Genres)
+def taxonomy_changed(sender, **kwargs):
+    catalog.taxonomy_changed()
+
+
+@receiver(pre_delete, sender=Categories)
+def category_deleting(sender, instance, **kwargs):
+    """SET_NULL у произведений выполняется без сигналов `Title`."""
+    Title.objects.filter(category=instance).update(**increment('version'))
+    catalog.title_changed(*catalog.engine.category_title_ids(instance.pk))
+    LeaderboardEntry.objects.filter(
+        board=leaderboards.category_board(instance.pk)
+    ).delete()
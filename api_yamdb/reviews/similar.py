@@ -0,0 +1,368 @@
+"""Похожие произведения по жанрам, категории и году.
+
+Похожесть пары: `W_GENRES * Jaccard(жанры) + W_CATEGORY * [та же
+категория] + W_YEAR / (1 + |разница лет| / YEAR_SCALE)`. Кандидаты -
+произведения хотя бы с одним общим жанром, а для произведений без
+жанров - тоже без жанров. Для каждого произведения в `TitleNeighbour`
+хранятся `K` лучших соседей, выдача - срез индекса.
+
+Полная перестройка - команда `rebuild_similar_titles`. Произведения
+группируются по набору жанров, Jaccard считается между наборами, а не
+между парами произведений. Внутри группы ближайшие по году ищутся
+бинарным поиском, а группы, которые уже не могут улучшить список,
+отбрасываются по верхней оценке.
+
+Изменения копятся до коммита транзакции и обрабатываются одной пачкой:
+удаление жанра задевает все его произведения разом. Для пачки
+загружаются кандидаты с общими жанрами и группируются так же, как при
+полной перестройке; списки изменённых произведений и списки, где они
+были, пересчитываются целиком, а в остальные изменённые добавляются,
+если проходят в их `K` лучших.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Title, TitleGenres, TitleNeighbour
+
+K = 20
+W_GENRES = 0.6
+W_CATEGORY = 0.25
+W_YEAR = 0.15
+YEAR_SCALE = 10
+# Больше новых произведений за раз - дешевле перестроить индекс целиком.
+REBUILD_THRESHOLD = 200
+BATCH_SIZE = 500
+SIMILAR = TitleNeighbour.SIMILAR
+
+
+def jaccard(genres, other):
+    if not genres and not other:
+        return 1.0
+    shared = len(genres & other)
+    return shared / (len(genres) + len(other) - shared)
+
+
+def similarity(genre_share, same_category, year_distance):
+    return (
+        W_GENRES * genre_share
+        + (W_CATEGORY if same_category else 0.0)
+        + W_YEAR / (1 + year_distance / YEAR_SCALE)
+    )
+
+
+def _group(titles):
+    """Группы `набор жанров -> категория -> (годы, id)`."""
+    groups = {}
+    for pk, signature, category_id, year in titles:
+        groups.setdefault(signature, {}).setdefault(category_id, []).append(
+            (year, pk)
+        )
+    for buckets in groups.values():
+        for category_id, items in buckets.items():
+            items.sort()
+            buckets[category_id] = (
+                [year for year, _ in items], [pk for _, pk in items]
+            )
+    return groups
+
+
+def _load():
+    """Все произведения `(id, жанры, категория, год)` и их группы."""
+    genres = {}
+    for title_id, genre_id in TitleGenres.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator():
+        genres.setdefault(title_id, set()).add(genre_id)
+    titles = [
+        (pk, frozenset(genres.get(pk, ())), category_id, year)
+        for pk, category_id, year in Title.objects.values_list(
+            'pk', 'category_id', 'year'
+        ).iterator()
+    ]
+    return titles, _group(titles)
+
+
+def _signature_neighbours(groups, signatures=None):
+    """Наборы жанров с общими жанрами, по убыванию Jaccard.
+
+    `signatures` - для каких наборов искать, по умолчанию для всех.
+    """
+    by_genre = {}
+    for signature in groups:
+        for genre_id in signature:
+            by_genre.setdefault(genre_id, []).append(signature)
+    result = {}
+    for signature in groups if signatures is None else signatures:
+        candidates = {signature}
+        for genre_id in signature:
+            candidates.update(by_genre[genre_id])
+        result[signature] = sorted(
+            ((jaccard(signature, other), other) for other in candidates),
+            key=lambda item: -item[0]
+        )
+    return result
+
+
+def _nearest(years, ids, year):
+    """Произведения группы в порядке удаления их года от `year`."""
+    right = bisect_left(years, year)
+    left = right - 1
+    while left >= 0 or right < len(years):
+        if right >= len(years) or (
+            left >= 0 and year - years[left] <= years[right] - year
+        ):
+            yield years[left], ids[left]
+            left -= 1
+        else:
+            yield years[right], ids[right]
+            right += 1
+
+
+def push_best(best, score, neighbour_id, limit):
+    """Добавляет соседа в кучу лучших; False, если он в неё не прошёл."""
+    if len(best) < limit:
+        heapq.heappush(best, (score, -neighbour_id))
+    elif score > best[0][0]:
+        heapq.heapreplace(best, (score, -neighbour_id))
+    else:
+        return False
+    return True
+
+
+def ranked(best):
+    return sorted(
+        ((-negative_id, score) for score, negative_id in best),
+        key=lambda item: (-item[1], item[0])
+    )
+
+
+def _top(title, groups, neighbours, limit=K):
+    pk, signature, category_id, year = title
+    best = []
+    for genre_share, other in neighbours[signature]:
+        ceiling = similarity(genre_share, True, 0)
+        if len(best) >= limit and ceiling <= best[0][0]:
+            break
+        for other_category, (years, ids) in groups[other].items():
+            same = category_id is not None and other_category == category_id
+            for other_year, other_id in _nearest(years, ids, year):
+                if other_id == pk:
+                    continue
+                score = similarity(genre_share, same, abs(other_year - year))
+                if not push_best(best, score, other_id, limit):
+                    break
+    return ranked(best)
+
+
+def rebuild(batch_size=1000):
+    """Перестраивает индекс похожих произведений. Возвращает число строк."""
+    titles, groups = _load()
+    neighbours = _signature_neighbours(groups)
+    created = 0
+    with transaction.atomic():
+        TitleNeighbour.objects.filter(kind=SIMILAR).delete()
+        batch = []
+        for title in titles:
+            batch.extend(
+                TitleNeighbour(
+                    kind=SIMILAR, title_id=title[0], neighbour_id=pk,
+                    score=score
+                )
+                for pk, score in _top(title, groups, neighbours)
+            )
+            if len(batch) >= batch_size:
+                TitleNeighbour.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        TitleNeighbour.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _load_titles(ids):
+    """Произведения `ids` - список или подзапрос - как в `_load()`."""
+    genres = {}
+    for pk, genre_id in TitleGenres.objects.filter(
+        title_id__in=ids
+    ).values_list('title_id', 'genre_id'):
+        genres.setdefault(pk, set()).add(genre_id)
+    return [
+        (pk, frozenset(genres.get(pk, ())), category_id, year)
+        for pk, category_id, year in Title.objects.filter(
+            pk__in=ids
+        ).values_list('pk', 'category_id', 'year')
+    ]
+
+
+def _candidates(titles):
+    """Группы кандидатов в соседи для всех произведений `titles` сразу."""
+    genres = frozenset().union(*(title[1] for title in titles))
+    condition = Q(genre__in=genres)
+    if any(not title[1] for title in titles):
+        condition |= Q(genre__isnull=True)
+    return _group(_load_titles(
+        Title.objects.filter(condition).values('pk')
+    ))
+
+
+def _offers(title, groups, neighbours, skip):
+    """Пары `(id кандидата, похожесть)`, кроме произведений из `skip`.
+
+    Jaccard считается один раз на группу с тем же набором жанров.
+    """
+    pk, signature, category_id, year = title
+    for genre_share, other in neighbours[signature]:
+        for other_category, (years, ids) in groups[other].items():
+            same = category_id is not None and other_category == category_id
+            for other_year, other_id in zip(years, ids):
+                if other_id not in skip:
+                    yield other_id, similarity(
+                        genre_share, same, abs(other_year - year)
+                    )
+
+
+def offer_many(kind, offers, limit=K):
+    """Добавляет соседей в списки, где они проходят в `limit` лучших.
+
+    `offers` - id произведения -> пары `(id нового соседа, похожесть)`.
+    """
+    lists = {}
+    for ids in _chunks(offers):
+        for title_id, pk, neighbour_id, score in TitleNeighbour.objects.filter(
+            kind=kind, title_id__in=ids
+        ).values_list('title_id', 'pk', 'neighbour_id', 'score'):
+            lists.setdefault(title_id, []).append((score, -neighbour_id, pk))
+    created, removed = [], []
+    for title_id, offered in offers.items():
+        best = lists.get(title_id, [])
+        heapq.heapify(best)
+        for neighbour_id, score in offered:
+            entry = (score, -neighbour_id, None)
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif score > best[0][0]:
+                weakest = heapq.heapreplace(best, entry)
+                if weakest[2] is not None:
+                    removed.append(weakest[2])
+        created.extend(
+            TitleNeighbour(
+                kind=kind, title_id=title_id, neighbour_id=-negative_id,
+                score=score
+            )
+            for score, negative_id, pk in best if pk is None
+        )
+    for ids in _chunks(removed):
+        TitleNeighbour.objects.filter(pk__in=ids).delete()
+    TitleNeighbour.objects.bulk_create(created, batch_size=BATCH_SIZE)
+
+
+def lists_containing(*title_ids):
+    """id произведений, в списках похожих которых есть `title_ids`."""
+    result = set()
+    for ids in _chunks(title_ids):
+        result.update(TitleNeighbour.objects.filter(
+            kind=SIMILAR, neighbour_id__in=ids
+        ).values_list('title_id', flat=True))
+    return result - set(title_ids)
+
+
+def refresh_titles(title_ids, list_ids=(), added=False):
+    """Обновляет индекс после изменения произведений одной пачкой.
+
+    Списки ближайших соседей несимметричны: произведение может быть в
+    чужом списке, не имея того в своём, и наоборот. Поэтому списки
+    изменённых произведений, списки, где они были, и `list_ids`
+    пересчитываются целиком, а всем остальным кандидатам изменённые
+    предлагаются. Новых произведений (`added`) ещё нет ни в одном
+    списке, и своих списков у них тоже нет.
+    """
+    title_ids = set(title_ids)
+    with transaction.atomic():
+        recomputed = title_ids | set(list_ids)
+        if not added:
+            recomputed |= lists_containing(*title_ids)
+        titles = _load_titles(list(recomputed))
+        groups = _candidates(titles) if titles else {}
+        neighbours = _signature_neighbours(
+            groups, {title[1] for title in titles}
+        )
+        created = []
+        offers = {}
+        for title in titles:
+            pk = title[0]
+            created.extend(
+                TitleNeighbour(
+                    kind=SIMILAR, title_id=pk, neighbour_id=neighbour_id,
+                    score=score
+                )
+                for neighbour_id, score in _top(title, groups, neighbours)
+            )
+            if pk not in title_ids:
+                continue
+            for other, score in _offers(title, groups, neighbours, recomputed):
+                offers.setdefault(other, []).append((pk, score))
+        for ids in _chunks(() if added else recomputed):
+            TitleNeighbour.objects.filter(
+                kind=SIMILAR, title_id__in=ids
+            ).delete()
+        TitleNeighbour.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        offer_many(SIMILAR, offers)
+
+
+def titles_added(*title_ids):
+    """Добавляет в индекс новые произведения; большие пачки - перестройкой.
+    """
+    if len(title_ids) > REBUILD_THRESHOLD:
+        rebuild()
+    else:
+        refresh_titles(title_ids, added=True)
+
+
+_pending = threading.local()
+
+
+def _flush():
+    title_ids, list_ids = _pending.batch
+    _pending.batch = None
+    refresh_titles(title_ids, list_ids)
+
+
+def schedule_refresh(title_ids=(), list_ids=()):
+    """Копит изменения до коммита: одна пачка `refresh_titles` на транзакцию.
+
+    `title_ids` - произведения, у которых изменились жанры, категория
+    или год; `list_ids` - произведения, которым нужно пересчитать только
+    собственные списки. После отката транзакции её пачка отбрасывается.
+    """
+    batch = getattr(_pending, 'batch', None)
+    if batch is None or not any(
+        hook[1] is _flush
+        for hook in transaction.get_connection().run_on_commit
+    ):
+        # Вне транзакции on_commit вызывает `_flush` сразу, поэтому
+        # пачка заполняется до регистрации.
+        _pending.batch = (set(title_ids), set(list_ids))
+        transaction.on_commit(_flush)
+        return
+    batch[0].update(title_ids)
+    batch[1].update(list_ids)
+
+
+def neighbour_ids(kind, title_id, limit=K):
+    """id и похожесть соседей произведения в индексе `kind` - срез."""
+    return list(
+        TitleNeighbour.objects.filter(kind=kind, title_id=title_id)
+        .order_by('-score', 'neighbour_id')
+        .values_list('neighbour_id', 'score')[:min(limit, K)]
+    )
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client, user):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Отлично', 10)
+        create_single_review(user_client, title_id, 'Неплохо', 5)
+        response = create_single_review(
+            moderator_client, title_id, 'Плохо', 2
+        )
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (17, 3), (
+            'Проверьте, что при создании отзыва сумма и количество оценок '
+            'произведения обновляются.'
+        )
+        assert self.get_title(admin_client, title_id)['rating'] == 5
+
+        review_id = response.json()['id']
+        moderator_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+            data={'score': 8}
+        )
+        assert self.get_title(admin_client, title_id)['rating'] == 7, (
+            'Проверьте, что при изменении оценки в отзыве рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        moderator_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        )
+        assert self.get_title(admin_client, title_id)['rating'] == 7
+
+        user.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (10, 1), (
+            'Проверьте, что при каскадном удалении отзывов вместе с автором '
+            'рейтинг произведения пересчитывается.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/'
+            f'{Title.objects.get(pk=title_id).reviews.get().id}/'
+        )
+        assert self.get_title(admin_client, title_id)['rating'] is None, (
+            'Если у произведения не осталось отзывов - значением поля '
+            '`rating` должно быть `None`.'
+        )
+
+    def test_02_score_histogram(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/histogram/'
+        create_single_review(admin_client, title_id, 'Отлично', 10)
+        response = create_single_review(user_client, title_id, 'Так', 3)
+
+        response_hist = client.get(url)
+        assert response_hist.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` должен возвращать ответ со статусом 200.'
+        )
+        expected = [0, 0, 1, 0, 0, 0, 0, 0, 0, 1]
+        assert response_hist.json()['score_histogram'] == expected
+
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{response.json()["id"]}/',
+            data={'score': 4}
+        )
+        expected = [0, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+        assert client.get(url).json()['score_histogram'] == expected, (
+            'Проверьте, что при изменении оценки гистограмма обновляется.'
+        )
+
+        assert 'score_histogram' not in self.get_title(client, title_id)
+        data = client.get(
+            f'/api/v1/titles/{title_id}/?histogram=true'
+        ).json()
+        assert data['score_histogram'] == expected
+        data = client.get('/api/v1/titles/?histogram=true').json()
+        assert data['results'][1]['score_histogram'] == expected
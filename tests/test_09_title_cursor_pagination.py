@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleCursorPagination:
+    url = '/api/v1/titles/'
+
+    def create_titles(self, admin_client, names):
+        categories = create_categories(admin_client)
+        for year, name in enumerate(names, 1950):
+            response = admin_client.post(self.url, data={
+                'name': name,
+                'year': year,
+                'genre': [],
+                'category': categories[0]['slug'],
+            })
+            assert response.status_code == HTTPStatus.CREATED
+
+    def test_01_walk_forward_and_back(self, admin_client, client):
+        names = ['Б', 'А', 'В', 'А', 'Г']
+        self.create_titles(admin_client, names)
+
+        response = client.get(f'{self.url}?cursor=&limit=2')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме курсорной пагинации ответ не содержит '
+            'ключ `count`.'
+        )
+        assert data['previous'] is None
+        seen = [title['name'] for title in data['results']]
+        pages = [data]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data)
+            seen.extend(title['name'] for title in data['results'])
+        assert seen == sorted(names), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/?cursor=` '
+            'обходит все произведения в порядке (name, id) без пропусков и '
+            'повторов.'
+        )
+
+        previous = client.get(pages[-1]['previous']).json()
+        assert previous['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую '
+            'страницу.'
+        )
+
+    def test_02_invalid_cursor_and_page_size(self, admin_client, client):
+        self.create_titles(admin_client, ['А', 'Б'])
+        response = client.get(f'{self.url}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        response = client.get(f'{self.url}?cursor=&limit=100000')
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == 2
+
+        response = client.get(self.url)
+        assert response.json()['count'] == 2, (
+            'Без параметра `cursor` должна использоваться пагинация '
+            'LimitOffset.'
+        )
+
+    def test_03_cursor_with_ordering_or_search(self, admin_client, client):
+        self.create_titles(admin_client, ['Б', 'А'])
+        for query in ('ordering=year', 'ordering=-name', 'search=А'):
+            response = client.get(f'{self.url}?{query}&cursor=')
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `?{query}` вместе с `cursor` возвращает '
+                'ответ со статусом 400: курсор задаёт порядок (name, id).'
+            )
+            assert 'cursor' in response.json()
+            assert client.get(
+                f'{self.url}?{query}'
+            ).status_code == HTTPStatus.OK
+        response = client.get(f'{self.url}?ordering=name&cursor=')
+        assert response.status_code == HTTPStatus.OK
+        assert [title['name'] for title in response.json()['results']] == [
+            'А', 'Б'
+        ]
@@ -0,0 +1,33 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleQueries:
+
+    def test_01_list_query_count(self, admin_client, client,
+                                 django_assert_num_queries):
+        create_titles(admin_client)
+        # COUNT(*), произведения с категориями, жанры одним запросом;
+        # дальше число строк берётся из кэша.
+        for queries, limit in ((3, 1), (2, 2), (2, 50)):
+            with django_assert_num_queries(queries):
+                response = client.get(f'/api/v1/titles/?limit={limit}')
+            assert response.status_code == HTTPStatus.OK
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/?cursor=&limit=50')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_retrieve_query_count(self, admin_client, client,
+                                     django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        # Версия для ETag, произведение с категорией, жанры.
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['category'] == categories[0]
+        assert data['genre'] == [genres[1], genres[0]]
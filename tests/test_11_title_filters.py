@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleFilters:
+    url = '/api/v1/titles/'
+
+    def create_titles(self, admin_client, titles):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        for data in titles:
+            data.setdefault('year', 2000)
+            data.setdefault('genre', [genres[0]['slug']])
+            data.setdefault('category', categories[0]['slug'])
+            response = admin_client.post(self.url, data=data)
+            assert response.status_code == HTTPStatus.CREATED
+        return genres, categories
+
+    def get_names(self, client, query):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        return {title['name'] for title in response.json()['results']}
+
+    def test_01_year_filters(self, admin_client, client):
+        self.create_titles(admin_client, [
+            {'name': 'Девятнадцать', 'year': 19},
+            {'name': 'Бегущий по лезвию', 'year': 1982},
+            {'name': 'Нечто', 'year': 1984},
+            {'name': 'Паразиты', 'year': 2019},
+        ])
+        assert self.get_names(client, 'year=19') == {'Девятнадцать'}, (
+            'Проверьте, что фильтр `year` сравнивает год целиком, а не '
+            'ищет подстроку.'
+        )
+        assert self.get_names(client, 'year_min=1983&year_max=2019') == {
+            'Нечто', 'Паразиты'
+        }
+        assert self.get_names(client, 'year__in=1982,2019') == {
+            'Бегущий по лезвию', 'Паразиты'
+        }
+
+    def test_02_search(self, admin_client, client):
+        self.create_titles(admin_client, [
+            {'name': 'Ёлки', 'description': 'Новогодняя комедия'},
+            {'name': 'Терминатор', 'description': 'Я вернусь'},
+            {'name': 'Терминал', 'description': 'Комедия в аэропорту'},
+            {'name': 'Комедия ошибок', 'description': 'Шекспир'},
+        ])
+        assert self.get_names(client, 'search=елки') == {'Ёлки'}, (
+            'Проверьте, что поиск не различает `ё` и `е`.'
+        )
+        assert self.get_names(client, 'search=ТЕРМИН') == {
+            'Терминатор', 'Терминал'
+        }, (
+            'Проверьте, что поиск по кириллице не зависит от регистра и '
+            'находит слова по префиксу.'
+        )
+        response = client.get(f'{self.url}?search=комедия')
+        names = [title['name'] for title in response.json()['results']]
+        assert len(names) == 3 and names[0] == 'Комедия ошибок', (
+            'Проверьте, что результаты поиска отсортированы по '
+            'релевантности и совпадение в названии важнее описания.'
+        )
+
+        response = client.get(f'{self.url}?search=терминал')
+        title_id = response.json()['results'][0]['id']
+        admin_client.patch(
+            f'{self.url}{title_id}/', data={'name': 'Аэропорт'}
+        )
+        assert self.get_names(client, 'search=терминал') == set(), (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'произведения.'
+        )
+        assert self.get_names(client, 'search=аэропорт') == {'Аэропорт'}
+        admin_client.delete(f'{self.url}{title_id}/')
+        assert self.get_names(client, 'search=аэропорт') == set()
@@ -0,0 +1,146 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre, create_single_review
+
+
+@pytest.fixture
+def catalog(settings):
+    from reviews.catalog import engine
+
+    settings.TITLE_CATALOG_ENGINE = True
+    engine.clear()
+    yield engine
+    engine.clear()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleCatalog:
+    url = '/api/v1/titles/'
+
+    def create_titles(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        titles = [
+            ('Чужой', 1979, [genres[0]['slug']], categories[0]['slug']),
+            ('Шрек', 2001, [genres[1]['slug']], categories[0]['slug']),
+            ('Зомбилэнд', 2009, [genres[0]['slug'], genres[1]['slug']],
+             categories[0]['slug']),
+            ('Оно', 1986, [genres[0]['slug']], categories[1]['slug']),
+        ]
+        ids = {}
+        for name, year, genre, category in titles:
+            response = admin_client.post(self.url, data={
+                'name': name, 'year': year, 'genre': genre,
+                'category': category,
+            })
+            assert response.status_code == HTTPStatus.CREATED
+            ids[name] = response.json()['id']
+        return ids, genres, categories
+
+    def get_names(self, client, query=''):
+        response = client.get(f'{self.url}?{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_same_results_as_database(self, admin_client, client,
+                                         settings, catalog):
+        self.create_titles(admin_client)
+        queries = (
+            '', 'limit=2&offset=1', 'genre=horror', 'category=books',
+            'genre__any=horror,comedy', 'genre__all=horror,comedy',
+            'year_min=1980&year_max=2005', 'year__in=1979,2009',
+            'year=2001', 'genre=hor&category=films&year_max=2000',
+            'ordering=-year', 'ordering=year&genre=horror', 'ordering=-name',
+        )
+        for query in queries:
+            settings.TITLE_CATALOG_ENGINE = False
+            expected = client.get(f'{self.url}?{query}').json()
+            settings.TITLE_CATALOG_ENGINE = True
+            assert client.get(f'{self.url}?{query}').json() == expected, (
+                'Проверьте, что in-memory каталог возвращает то же, что и '
+                f'запрос к БД, для `{self.url}?{query}`.'
+            )
+        assert catalog.is_loaded
+
+    def test_02_incremental_updates(self, admin_client, user_client,
+                                    client, catalog,
+                                    django_assert_num_queries):
+        ids, genres, _ = self.create_titles(admin_client)
+        assert self.get_names(client, 'genre__all=horror,comedy') == [
+            'Зомбилэнд'
+        ]
+        admin_client.patch(f'{self.url}{ids["Шрек"]}/', data={
+            'genre': [genres[0]['slug'], genres[1]['slug']],
+            'year': 2001,
+        })
+        assert self.get_names(client, 'genre__all=horror,comedy') == [
+            'Зомбилэнд', 'Шрек'
+        ]
+        admin_client.delete(f'{self.url}{ids["Оно"]}/')
+        assert 'Оно' not in self.get_names(client)
+
+        admin_client.delete('/api/v1/categories/books/')
+        assert self.get_names(client, 'category=books') == []
+
+        create_single_review(user_client, ids['Чужой'], 'Класс', 9)
+        data = client.get(f'{self.url}?year=1979').json()
+        assert data['results'][0]['rating'] == 9
+
+        # Страница: только произведения по pk и их жанры, без COUNT(*).
+        with django_assert_num_queries(2):
+            client.get(f'{self.url}?genre=horror')
+
+    def test_03_orders_survive_writes(self, admin_client, user_client,
+                                      client, settings, catalog):
+        ids, genres, categories = self.create_titles(admin_client)
+        queries = ('ordering=name', 'ordering=-year', 'ordering=-rating')
+        for query in queries:
+            self.get_names(client, query)
+        orders = dict(catalog._orders)
+
+        admin_client.post(self.url, data={
+            'name': 'Бэтмен', 'year': 1989, 'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        })
+        create_single_review(user_client, ids['Оно'], 'Страшно', 8)
+        admin_client.patch(f'{self.url}{ids["Шрек"]}/', data={
+            'name': 'Шрек 2', 'year': 2004,
+        })
+        for query in queries:
+            names = self.get_names(client, query)
+            settings.TITLE_CATALOG_ENGINE = False
+            assert names == self.get_names(client, query), (
+                'Проверьте, что после записи in-memory каталог сортирует '
+                f'так же, как БД, для `{self.url}?{query}`.'
+            )
+            settings.TITLE_CATALOG_ENGINE = True
+        for ordering, (order, _) in orders.items():
+            assert catalog._orders[ordering][0] is order, (
+                'Проверьте, что новая позиция вставляется в готовую '
+                'сортировку, а не сбрасывает её.'
+            )
+
+    def test_04_stale_reload_in_background(self, admin_client, client,
+                                           settings, catalog):
+        from reviews.models import Title
+
+        self.create_titles(admin_client)
+        self.get_names(client)
+        # Запись в обход сигналов видна только после полной перезагрузки.
+        Title.objects.filter(name='Оно').update(year=2020)
+        settings.TITLE_CATALOG_MAX_AGE = 0
+        loaded_at = catalog.loaded_at
+        with catalog._lock:
+            # Фоновый поток не подменит копию, пока блокировка занята.
+            assert self.get_names(client, 'year=2020') == [], (
+                'Проверьте, что устаревший каталог отвечает, пока новый '
+                'строится в фоне.'
+            )
+        catalog.reloader.join()
+        assert catalog.loaded_at > loaded_at
+        settings.TITLE_CATALOG_MAX_AGE = 300
+        assert self.get_names(client, 'year=2020') == ['Оно'], (
+            'Проверьте, что фоновая перезагрузка подменяет каталог.'
+        )
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleOrdering:
+    url = '/api/v1/titles/'
+
+    def rate(self, admin_client, user_client, moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        # Терминатор: 10 и 10, Крепкий орешек: одна 10 и одна 6.
+        create_single_review(admin_client, titles[0]['id'], 'a', 10)
+        create_single_review(user_client, titles[0]['id'], 'b', 10)
+        create_single_review(moderator_client, titles[1]['id'], 'c', 10)
+        create_single_review(user_client, titles[1]['id'], 'd', 6)
+        return titles, categories, genres
+
+    def test_01_ordering(self, admin_client, user_client, moderator_client,
+                         client):
+        titles, _, _ = self.rate(admin_client, user_client, moderator_client)
+        for ordering, expected in (
+            ('-rating', [titles[0]['name'], titles[1]['name']]),
+            ('rating', [titles[1]['name'], titles[0]['name']]),
+            ('year', [titles[0]['name'], titles[1]['name']]),
+            ('-name', [titles[0]['name'], titles[1]['name']]),
+        ):
+            response = client.get(f'{self.url}?ordering={ordering}')
+            assert response.status_code == HTTPStatus.OK
+            names = [title['name'] for title in response.json()['results']]
+            assert names == expected, (
+                f'Проверьте, что `{self.url}` поддерживает сортировку '
+                f'`ordering={ordering}`.'
+            )
+
+    def test_02_leaderboards(self, admin_client, user_client,
+                             moderator_client, client):
+        titles, categories, genres = self.rate(
+            admin_client, user_client, moderator_client
+        )
+        url = f'{self.url}top/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{url}` должен возвращать ответ со статусом 200.'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [
+            titles[0]['id'], titles[1]['id']
+        ]
+        assert data[0]['score'] == round((10 * 7 + 20) / 12, 3), (
+            'Проверьте, что оценка в рейтинговой таблице сглажена '
+            'байесовским средним.'
+        )
+
+        data = client.get(f'{url}?category={categories[1]["slug"]}').json()
+        assert [title['id'] for title in data] == [titles[1]['id']]
+        data = client.get(f'{url}?genre={genres[0]["slug"]}').json()
+        assert [title['id'] for title in data] == [titles[0]['id']]
+        response = client.get(f'{url}?genre=unknown')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        review = client.get(
+            f'{self.url}{titles[0]["id"]}/reviews/'
+        ).json()['results'][0]
+        admin_client.delete(
+            f'{self.url}{titles[0]["id"]}/reviews/{review["id"]}/'
+        )
+        data = client.get(url).json()
+        assert data[0]['score'] == round((10 * 7 + 10) / 11, 3), (
+            'Проверьте, что рейтинговые таблицы обновляются при изменении '
+            'отзывов.'
+        )
+
+        from reviews.models import LeaderboardEntry
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards')
+        assert client.get(url).json() == data
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14SparseFields:
+
+    def test_01_titles(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{url}?fields=id,name,rating')
+        assert response.status_code == HTTPStatus.OK
+        for title in response.json()['results']:
+            assert set(title) == {'id', 'name', 'rating'}, (
+                f'Проверьте, что `{url}?fields=` оставляет в ответе только '
+                'перечисленные поля.'
+            )
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что при `?fields=` без `genre` жанры не '
+            'подгружаются.'
+        )
+        assert 'description' not in context.captured_queries[-1]['sql'], (
+            'Проверьте, что при `?fields=` из БД загружаются только нужные '
+            'колонки.'
+        )
+
+        data = client.get(
+            f'{url}{titles[0]["id"]}/?omit=description,genre'
+        ).json()
+        assert set(data) == {
+            'id', 'name', 'year', 'rating', 'reviews_count', 'category'
+        }
+
+        data = client.get(
+            f'{url}{titles[0]["id"]}/?fields=name,score_histogram'
+        ).json()
+        assert set(data) == {'name', 'score_histogram'}
+
+    def test_02_reviews_and_comments(self, admin_client, admin, user_client,
+                                     user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(f'{url}?fields=id,score').json()
+        assert all(
+            set(review) == {'id', 'score'} for review in data['results']
+        )
+        data = client.get(
+            f'{url}{reviews[0]["id"]}/comments/?omit=review,pub_date'
+        ).json()
+        assert all(
+            set(comment) == {'id', 'text', 'author'}
+            for comment in data['results']
+        )
+
+        response = user_client.patch(
+            f'{url}{reviews[1]["id"]}/?fields=id', data={'score': 9}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['score'] == 9, (
+            'Параметр `fields` не должен влиять на запросы на запись.'
+        )
@@ -0,0 +1,34 @@
+import pytest
+
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15CompiledSerializers:
+
+    def test_01_same_json(self, admin_client, admin, user_client, user,
+                          moderator_client, client, monkeypatch):
+        from api.mixins import CompiledListMixin
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        create_single_review(moderator_client, titles[0]['id'], 'Ну', 3)
+        base = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?limit=1&offset=1',
+            '/api/v1/titles/?cursor=',
+            '/api/v1/titles/?ordering=-rating&fields=id,genre',
+            base,
+            f'{base}{reviews[0]["id"]}/comments/',
+        )
+        for url in urls:
+            compiled = client.get(url).content
+            monkeypatch.setattr(CompiledListMixin, 'compiled_list', False)
+            expected = client.get(url).content
+            monkeypatch.setattr(CompiledListMixin, 'compiled_list', True)
+            assert compiled == expected, (
+                f'Проверьте, что быстрый путь сериализации `{url}` '
+                'возвращает тот же JSON, что и ModelSerializer.'
+            )
@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ConditionalGet:
+
+    def test_01_title_etag(self, admin_client, client,
+                           django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and etag.startswith('"'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'сильный ETag.'
+        )
+
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает 304 по одной лишь версии.'
+        )
+        assert response['ETag'] == etag
+
+        admin_client.patch(url, data={'name': 'Новое название'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение произведения меняет его ETag.'
+        )
+        assert response.json()['name'] == 'Новое название'
+        assert response['ETag'] != etag
+
+    def test_02_reviews_and_comments(self, admin_client, admin, user_client,
+                                     user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        assert client.get(
+            f'{url}?fields=id', HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag учитывает параметры запроса.'
+        )
+
+        review_url = f'{url}{reviews[1]["id"]}/'
+        response = client.get(review_url)
+        last_modified = response['Last-Modified']
+        assert client.get(
+            review_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{review_url}` учитывает '
+            '`If-Modified-Since`.'
+        )
+
+        user_client.patch(review_url, data={'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет ETag списка отзывов.'
+        )
+        response = client.get(review_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после правки отзыва `If-Modified-Since` по '
+            'дате публикации не даёт 304.'
+        )
+        assert 'Last-Modified' not in response
+
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        etag = client.get(comments_url)['ETag']
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        user_client.delete(f'{comments_url}{comments[1]["id"]}/')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментария меняет ETag списка.'
+        )
+        assert len(response.json()['results']) == len(comments) - 1
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TaxonomyCache:
+
+    def test_01_categories_cache(self, admin_client, client,
+                                 django_assert_num_queries):
+        categories = create_categories(admin_client)
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert 'max-age=' in response['Cache-Control'], (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `Cache-Control`.'
+        )
+        with django_assert_num_queries(0):
+            cached = client.get(url)
+        assert cached['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из '
+            'кэша без обращения к БД.'
+        )
+        assert cached.content == response.content
+        assert cached['Content-Type'] == response['Content-Type']
+        assert client.get(f'{url}?search=a')['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы кэшируются отдельно для каждой строки '
+            'запроса.'
+        )
+
+        admin_client.post(url, data={'name': 'Новая', 'slug': 'new'})
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что создание категории сбрасывает кэш списка.'
+        )
+        assert response.json()['count'] == len(categories) + 1
+
+        admin_client.delete(f'{url}new/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление категории сбрасывает кэш списка.'
+        )
+        assert response.json()['count'] == len(categories)
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+
+        stats = admin_client.get('/api/v1/cache-stats/').json()
+        assert stats['categories']['hits'] == 1
+        assert stats['categories']['misses'] == 4
+        assert stats['categories']['hit_ratio'] == 0.2
+        assert client.get(
+            '/api/v1/cache-stats/'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_02_cache_key_host_and_scheme(self, admin_client, client):
+        create_categories(admin_client)
+        url = '/api/v1/categories/?limit=1'
+        response = client.get(url)
+        assert response.json()['next'].startswith('http://testserver/')
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        other = client.get(url, HTTP_HOST='mirror.yamdb.fake')
+        assert other['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы кэшируются отдельно для каждого хоста.'
+        )
+        assert other.json()['next'].startswith('http://mirror.yamdb.fake/')
+
+        secure = client.get(url, secure=True)
+        assert secure['X-Cache'] == 'MISS', (
+            'Проверьте, что ответы кэшируются отдельно для http и https.'
+        )
+        assert secure.json()['next'].startswith('https://testserver/')
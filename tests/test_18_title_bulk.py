@@ -0,0 +1,116 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18TitleBulk:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create(self, admin_client, django_assert_max_num_queries):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = [
+            {
+                'name': f'Произведение {number}',
+                'year': 2000 + number,
+                'category': categories[number % 2]['slug'],
+                'genre': [genres[0]['slug'], genres[number % 3]['slug']],
+            }
+            for number in range(20)
+        ]
+        data.insert(3, {'name': 'Без года', 'category': 'films'})
+        data.insert(7, {
+            'name': 'Неизвестные слаги', 'year': 2000,
+            'category': 'nope', 'genre': [genres[0]['slug'], 'missing'],
+        })
+        # Вставка и обновление индекса похожих - пачками, без запросов
+        # на каждое произведение.
+        with django_assert_max_num_queries(16):
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{self.url}` '
+            'возвращает статус 201.'
+        )
+        result = response.json()
+        assert [item['index'] for item in result['errors']] == [3, 7], (
+            'Проверьте, что ошибки возвращаются по индексам элементов.'
+        )
+        assert set(result['errors'][0]['errors']) == {'year', 'genre'}
+        assert set(result['errors'][1]['errors']) == {'category', 'genre'}
+        assert len(result['created']) == 20
+
+        created = result['created'][5]
+        item = data[created['index']]
+        title = admin_client.get(f'/api/v1/titles/{created["id"]}/').json()
+        assert title['name'] == item['name']
+        assert title['category']['slug'] == item['category']
+        assert {genre['slug'] for genre in title['genre']} == set(
+            item['genre']
+        ), 'Проверьте, что произведениям назначаются переданные жанры.'
+        similar = admin_client.get(
+            f'/api/v1/titles/{created["id"]}/similar/'
+        ).json()
+        assert similar, (
+            'Проверьте, что созданные пачкой произведения попадают в индекс '
+            'похожих.'
+        )
+        neighbour = similar[0]['id']
+        assert created['id'] in [
+            item['id'] for item in admin_client.get(
+                f'/api/v1/titles/{neighbour}/similar/'
+            ).json()
+        ]
+        search = admin_client.get('/api/v1/titles/?search=Произведение 13')
+        assert [
+            item['name'] for item in search.json()['results']
+        ] == ['Произведение 13'], (
+            'Проверьте, что созданные пачкой произведения попадают в '
+            'поисковый индекс.'
+        )
+
+    def test_02_bulk_errors(self, admin_client, user_client, client):
+        data = [{'name': 'Фильм', 'year': 2000, 'category': 'x', 'genre': []}]
+        assert client.post(
+            self.url, data=json.dumps(data), content_type='application/json'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.post(
+            self.url, data=data, format='json'
+        ).status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что пачка без корректных произведений возвращает 400.'
+        )
+        assert response.json()['created'] == []
+        assert admin_client.post(
+            self.url, data={'name': 'Фильм'}, format='json'
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_bulk_duplicates(self, admin_client):
+        categories = create_categories(admin_client)
+        create_genre(admin_client)
+        existing = {
+            'name': 'Чужой', 'year': 1979, 'genre': [],
+            'category': categories[0]['slug'],
+        }
+        response = admin_client.post(self.url, data=[existing], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        new = {**existing, 'year': 1986}
+        other_category = {**existing, 'category': categories[1]['slug']}
+        response = admin_client.post(
+            self.url, data=[existing, new, new, other_category],
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что дубликаты в пачке не приводят к ошибке сервера.'
+        )
+        result = response.json()
+        assert [item['index'] for item in result['created']] == [1, 3]
+        assert [item['index'] for item in result['errors']] == [0, 2], (
+            'Проверьте, что повтор существующего произведения и повтор '
+            'внутри пачки возвращаются как ошибки элементов.'
+        )
+        assert set(result['errors'][0]['errors']) == {'non_field_errors'}
@@ -0,0 +1,47 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TitleExport:
+    url = '/api/v1/titles/export/'
+
+    def test_01_export(self, admin_client, client, settings,
+                       django_assert_num_queries):
+        create_titles(admin_client)
+        settings.TITLE_CATALOG_ENGINE = False
+        settings.TITLE_EXPORT_CHUNK_SIZE = 1
+        titles = client.get('/api/v1/titles/').json()['results']
+        titles.sort(key=lambda title: title['id'])
+
+        response = client.get(self.url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что `{self.url}` отдаёт ответ потоком.'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        # Две пачки по одному произведению с жанрами и пустая последняя.
+        with django_assert_num_queries(5):
+            lines = b''.join(response.streaming_content).decode()
+        exported = [json.loads(line) for line in lines.splitlines()]
+        assert exported == titles, (
+            'Проверьте, что выгрузка содержит все произведения в порядке id '
+            'в том же виде, что и список.'
+        )
+
+        after = titles[0]['id']
+        response = client.get(f'{self.url}?after={after}&fields=id,name')
+        exported = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        assert exported == [
+            {'id': title['id'], 'name': title['name']} for title in titles[1:]
+        ], 'Проверьте, что `?after=<id>` продолжает выгрузку после id.'
+        assert client.get(
+            f'{self.url}?after=x'
+        ).status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_single_review
+
+
+def count_queries(context):
+    return sum(
+        'COUNT(' in query['sql'].upper() for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20CountPagination:
+
+    def test_01_cached_count(self, admin_client, admin, user_client, user,
+                             moderator_client, client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        assert client.get(url).json()['count'] == len(reviews)
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(f'{url}?limit=1').json()['count'] == len(
+                reviews
+            )
+        assert count_queries(context) == 0, (
+            f'Проверьте, что число строк для `{url}` берётся из кэша.'
+        )
+        other = client.get(f'/api/v1/titles/{titles[1]["id"]}/reviews/')
+        assert other.json()['count'] == 0, (
+            'Проверьте, что кэш числа строк учитывает фильтры выборки.'
+        )
+
+        create_single_review(moderator_client, titles[0]['id'], 'Ещё', 7)
+        assert client.get(url).json()['count'] == len(reviews) + 1, (
+            'Проверьте, что создание отзыва сбрасывает кэш числа строк.'
+        )
+
+    def test_02_count_false(self, admin_client, client):
+        for number in range(3):
+            admin_client.post(
+                '/api/v1/genres/',
+                data={'name': f'Жанр {number}', 'slug': f'genre-{number}'}
+            )
+        url = '/api/v1/genres/?count=false&limit=2'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что при `?count=false` число строк не считается.'
+        )
+        assert count_queries(context) == 0
+        assert len(data['results']) == 2
+        assert 'offset=2' in data['next']
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 1
+        assert data['next'] is None
+        assert data['previous'] is not None
+
+        data = client.get('/api/v1/genres/?count=estimate').json()
+        assert data['count'] == 3
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Include:
+
+    def test_01_title_with_reviews(self, admin_client, admin, user_client,
+                                   user, moderator_client, client,
+                                   django_assert_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        for number in range(4):
+            create_single_comment(
+                moderator_client, title_id, reviews[1]['id'],
+                f'comment {number}'
+            )
+        url = f'/api/v1/titles/{title_id}/'
+        # Произведение, жанры, отзывы, комментарии.
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'{url}?include=reviews,comments&comments_limit=2'
+            )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [review['id'] for review in data['reviews']] == [
+            reviews[1]['id'], reviews[0]['id']
+        ], 'Проверьте, что встраиваются последние отзывы произведения.'
+        assert [
+            comment['text'] for comment in data['reviews'][1]['comments']
+        ] == [comments[1]['text'], comments[0]['text']]
+        assert [
+            comment['text'] for comment in data['reviews'][0]['comments']
+        ] == ['comment 3', 'comment 2'], (
+            'Проверьте, что к каждому отзыву встраиваются не больше '
+            '`comments_limit` последних комментариев.'
+        )
+        review = client.get(
+            f'{url}reviews/{reviews[0]["id"]}/comments/'
+        ).json()['results'][0]
+        assert review == data['reviews'][1]['comments'][1], (
+            'Проверьте, что встроенные комментарии совпадают с ответом '
+            'эндпоинта комментариев.'
+        )
+
+        data = client.get(f'{url}?include=reviews&reviews_limit=1').json()
+        assert len(data['reviews']) == 1
+        assert 'comments' not in data['reviews'][0]
+        assert 'reviews' not in client.get(url).json()
+
+    def test_02_reviews_with_comments(self, admin_client, admin, user_client,
+                                      user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(f'{url}?include=comments').json()['results']
+        embedded = {review['id']: review['comments'] for review in data}
+        assert len(embedded[reviews[0]['id']]) == len(comments)
+        assert embedded[reviews[1]['id']] == []
@@ -0,0 +1,184 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+def create_title(admin_client, name, year, genres, category):
+    response = admin_client.post('/api/v1/titles/', data={
+        'name': name, 'year': year, 'genre': genres, 'category': category,
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    return response.json()['id']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SimilarTitles:
+
+    def test_01_similar(self, admin_client, client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        alien = create_title(
+            admin_client, 'Чужой', 1979, ['horror', 'drama'], 'films'
+        )
+        aliens = create_title(
+            admin_client, 'Чужие', 1986, ['horror', 'drama'], 'films'
+        )
+        shining = create_title(
+            admin_client, 'Сияние', 1977, ['horror'], 'books'
+        )
+        create_title(admin_client, 'Маска', 1994, ['comedy'], 'films')
+
+        url = f'/api/v1/titles/{alien}/similar/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [item['id'] for item in data] == [aliens, shining], (
+            f'Проверьте, что `{url}` возвращает произведения с общими '
+            'жанрами по убыванию похожести.'
+        )
+        assert data[0]['similarity'] > data[1]['similarity']
+        assert data[0]['name'] == 'Чужие'
+
+        before = {
+            pk: client.get(f'/api/v1/titles/{pk}/similar/').json()
+            for pk in (alien, aliens, shining)
+        }
+        call_command('rebuild_similar_titles')
+        for pk, data in before.items():
+            assert client.get(f'/api/v1/titles/{pk}/similar/').json() == (
+                data
+            ), (
+                'Проверьте, что инкрементальное обновление индекса совпадает '
+                'с полной перестройкой.'
+            )
+
+        admin_client.patch(
+            f'/api/v1/titles/{shining}/', data={'genre': ['comedy']}
+        )
+        assert [
+            item['id'] for item in client.get(url).json()
+        ] == [aliens], (
+            'Проверьте, что индекс обновляется при смене жанров.'
+        )
+        assert client.get(
+            '/api/v1/titles/999/similar/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_lists_keep_size(self, admin_client):
+        from reviews.models import TitleNeighbour
+        from reviews.similar import K
+
+        def index():
+            lists = {}
+            for title_id, neighbour_id in TitleNeighbour.objects.filter(
+                kind=TitleNeighbour.SIMILAR
+            ).values_list('title_id', 'neighbour_id'):
+                lists.setdefault(title_id, set()).add(neighbour_id)
+            return lists
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        ids = [
+            create_title(admin_client, f'Фильм {number}', 1950 + number * 3,
+                         ['horror'], 'films')
+            for number in range(K + 3)
+        ]
+        call_command('rebuild_similar_titles')
+        before = index()
+        assert all(len(items) == K for items in before.values())
+
+        admin_client.patch(
+            f'/api/v1/titles/{ids[5]}/', data={'year': 2020}
+        )
+        after = index()
+        assert all(len(items) == K for items in after.values()), (
+            'Проверьте, что изменение произведения не укорачивает списки '
+            'похожих у других произведений.'
+        )
+        assert ids[5] in after[ids[-1]], (
+            'Проверьте, что изменённое произведение попадает в списки, '
+            'где оно теперь в числе лучших.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            admin_client.patch(
+                f'/api/v1/titles/{ids[0]}/', data={'description': 'Опечатка'}
+            )
+        assert not any(
+            'reviews_titleneighbour' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что правка описания не пересчитывает индекс '
+            'похожих произведений.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{ids[-1]}/')
+        after = index()
+        assert ids[-1] not in after
+        assert all(len(items) == K for items in after.values()), (
+            'Проверьте, что удаление произведения не укорачивает списки '
+            'похожих у других произведений.'
+        )
+
+    def test_03_bulk_created(self, admin_client, client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        alien = create_title(
+            admin_client, 'Чужой', 1979, ['horror'], 'films'
+        )
+        response = admin_client.post('/api/v1/titles/bulk/', data=[
+            {'name': 'Чужие', 'year': 1986, 'genre': ['horror'],
+             'category': 'films'},
+        ], format='json')
+        aliens = response.json()['created'][0]['id']
+        for pk, neighbour in ((aliens, alien), (alien, aliens)):
+            assert [
+                item['id'] for item in client.get(
+                    f'/api/v1/titles/{pk}/similar/'
+                ).json()
+            ] == [neighbour], (
+                'Проверьте, что произведения, созданные через '
+                '`/titles/bulk/`, попадают в индекс похожих.'
+            )
+
+    def test_04_one_batch_per_transaction(self, admin_client, monkeypatch):
+        from reviews import similar
+        from reviews.models import TitleNeighbour
+
+        def index():
+            return sorted(TitleNeighbour.objects.filter(
+                kind=TitleNeighbour.SIMILAR
+            ).values_list('title_id', 'neighbour_id', 'score'))
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        for number in range(6):
+            create_title(
+                admin_client, f'Фильм {number}', 1980 + number,
+                ['horror', 'comedy'] if number % 2 else ['horror'], 'films'
+            )
+        batches = []
+        refresh_titles = similar.refresh_titles
+
+        def record(*args, **kwargs):
+            batches.append(args)
+            refresh_titles(*args, **kwargs)
+
+        monkeypatch.setattr(similar, 'refresh_titles', record)
+        admin_client.delete('/api/v1/genres/horror/')
+        assert len(batches) == 1, (
+            'Проверьте, что удаление жанра пересчитывает индекс похожих '
+            'одной пачкой, а не по разу на каждое произведение.'
+        )
+        assert len(batches[0][0]) == 6
+        incremental = index()
+        call_command('rebuild_similar_titles')
+        assert incremental == index(), (
+            'Проверьте, что пакетное обновление индекса совпадает с '
+            'полной перестройкой.'
+        )
@@ -0,0 +1,154 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+def also_liked(client, title_id):
+    response = client.get(f'/api/v1/titles/{title_id}/also-liked/')
+    assert response.status_code == HTTPStatus.OK
+    return [(item['id'], item['similarity']) for item in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23AlsoLiked:
+
+    def test_01_also_liked(self, admin_client, user_client, moderator_client,
+                           user_superuser_client, client):
+        titles, _, _ = create_titles(admin_client)
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['horror'],
+            'category': 'films',
+        }).json()['id']
+        first, second = titles[0]['id'], titles[1]['id']
+        scores = {
+            admin_client: (10, 9, 2),
+            user_client: (9, 10, 1),
+            moderator_client: (8, 9, 3),
+        }
+        for author, values in scores.items():
+            for title_id, score in zip((first, second, third), values):
+                create_single_review(author, title_id, 'Отзыв', score)
+
+        assert also_liked(client, first) == []
+        call_command('update_also_liked')
+        neighbours = also_liked(client, first)
+        assert [pk for pk, _ in neighbours] == [second], (
+            'Проверьте, что `also-liked` возвращает произведения, которые '
+            'высоко оценили те же пользователи, и не возвращает остальные.'
+        )
+        assert 0 < neighbours[0][1] <= 1
+
+        for title_id, score in zip((first, second, third), (10, 1, 10)):
+            create_single_review(
+                user_superuser_client, title_id, 'Отзыв', score
+            )
+        call_command('update_also_liked')
+        incremental = {
+            pk: also_liked(client, pk) for pk in (first, second, third)
+        }
+        call_command('update_also_liked', '--full')
+        assert {
+            pk: also_liked(client, pk) for pk in (first, second, third)
+        } == incremental, (
+            'Проверьте, что инкрементальный расчёт учитывает новые отзывы.'
+        )
+        assert client.get(
+            '/api/v1/titles/999/also-liked/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_incremental_matches_full(self, admin_client, user_client,
+                                         moderator_client,
+                                         user_superuser_client, client,
+                                         monkeypatch):
+        from reviews import also_liked as module
+        from reviews.models import RecommenderState
+
+        monkeypatch.setattr(module, 'K', 1)
+        titles, _, _ = create_titles(admin_client)
+        ids = [titles[0]['id'], titles[1]['id']]
+        for name in ('Чужой', 'Сияние'):
+            ids.append(admin_client.post('/api/v1/titles/', data={
+                'name': name, 'year': 1979, 'genre': ['horror'],
+                'category': 'films',
+            }).json()['id'])
+        # Лучший сосед второго произведения - первое, а у первого - третье.
+        for author, values in (
+            (admin_client, (4, 1, 5, 4)),
+            (user_client, (6, 6, 6, 8)),
+            (moderator_client, (10, 7, 7, 2)),
+        ):
+            for title_id, score in zip(ids, values):
+                create_single_review(author, title_id, 'Отзыв', score)
+        call_command('update_also_liked')
+        assert also_liked(client, ids[1])[0][0] == ids[0]
+
+        def check_matches_full():
+            incremental = {pk: also_liked(client, pk) for pk in ids}
+            call_command('update_also_liked', '--full')
+            assert {
+                pk: also_liked(client, pk) for pk in ids
+            } == incremental, (
+                'Проверьте, что инкрементальный расчёт совпадает с полным: '
+                'списки, где было пересчитанное произведение, пересчитываются.'
+            )
+
+        create_single_review(user_superuser_client, ids[0], 'Отзыв', 5)
+        call_command('update_also_liked')
+        check_matches_full()
+
+        create_single_review(user_superuser_client, ids[1], 'Отзыв', 9)
+        last_review_id = module._last_review_id()
+        create_single_review(user_superuser_client, ids[2], 'Отзыв', 1)
+        # Отзыв, созданный во время расчёта, ждёт следующего запуска.
+        monkeypatch.setattr(module, '_last_review_id', lambda: last_review_id)
+        call_command('update_also_liked')
+        assert RecommenderState.objects.get(
+            name=module.ALSO_LIKED
+        ).last_review_id == last_review_id, (
+            'Проверьте, что состояние продвигается только до отзыва, '
+            'прочитанного в начале расчёта.'
+        )
+        monkeypatch.undo()
+        monkeypatch.setattr(module, 'K', 1)
+        call_command('update_also_liked')
+        check_matches_full()
+
+    def test_03_blocks_load_only_readers(self, admin_client, user_client,
+                                         moderator_client, admin, user,
+                                         moderator, client, monkeypatch):
+        from reviews import also_liked as module
+
+        titles, _, _ = create_titles(admin_client)
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['horror'],
+            'category': 'films',
+        }).json()['id']
+        first, second = titles[0]['id'], titles[1]['id']
+        for author, rated in (
+            (admin_client, ((first, 9), (second, 8), (third, 2))),
+            (user_client, ((first, 10), (second, 9), (third, 3))),
+            (moderator_client, ((second, 2), (third, 9))),
+        ):
+            for title_id, score in rated:
+                create_single_review(author, title_id, 'Отзыв', score)
+
+        last_review_id = module._last_review_id()
+        norms = module.load_norms(last_review_id)
+        matrix = module.ScoreMatrix.load([first], last_review_id, norms)
+        assert set(matrix.by_user) == {admin.pk, user.pk}, (
+            'Проверьте, что для блока произведений загружаются оценки '
+            'только их читателей.'
+        )
+
+        call_command('update_also_liked', '--full')
+        full = {pk: also_liked(client, pk) for pk in (first, second, third)}
+        monkeypatch.setattr(module, 'BLOCK_SIZE', 1)
+        call_command('update_also_liked', '--full')
+        assert {
+            pk: also_liked(client, pk) for pk in (first, second, third)
+        } == full, (
+            'Проверьте, что результат не зависит от размера блока.'
+        )
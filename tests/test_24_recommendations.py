@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Recommendations:
+    url = '/api/v1/users/me/recommendations/'
+
+    def test_01_recommendations(self, admin_client, user_client,
+                                moderator_client, user_superuser_client,
+                                client, settings, tmp_path):
+        settings.RECOMMENDER_MODEL_PATH = tmp_path / 'factors.bin'
+        titles, _, _ = create_titles(admin_client)
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Чужой', 'year': 1979, 'genre': ['horror'],
+            'category': 'films',
+        }).json()['id']
+        first, second = titles[0]['id'], titles[1]['id']
+        for author, scores in (
+            (admin_client, ((first, 10), (second, 9), (third, 2))),
+            (moderator_client, ((first, 9), (second, 10), (third, 1))),
+            (user_client, ((first, 10),)),
+        ):
+            for title_id, score in scores:
+                create_single_review(author, title_id, 'Отзыв', score)
+        call_command('train_recommendations', '--epochs', '200')
+
+        response = user_client.get(self.url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` возвращает 200.'
+        )
+        data = response.json()
+        assert [item['id'] for item in data] == [second, third], (
+            'Проверьте, что рекомендации не содержат рецензированных '
+            'произведений и отсортированы по прогнозу оценки.'
+        )
+        assert data[0]['predicted_score'] > data[1]['predicted_score']
+        assert data[0]['name'] == titles[1]['name']
+
+        fallback = user_superuser_client.get(self.url).json()
+        assert {item['id'] for item in fallback} == {first, second, third}, (
+            'Проверьте, что пользователю без отзывов рекомендуются лучшие '
+            'произведения из общей рейтинговой таблицы.'
+        )
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_02_non_positive_limit(self, admin_client, user_client,
+                                   settings, tmp_path):
+        settings.RECOMMENDER_MODEL_PATH = tmp_path / 'factors.bin'
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(admin_client, first, 'Отзыв', 9)
+        create_single_review(admin_client, second, 'Отзыв', 7)
+        create_single_review(user_client, first, 'Отзыв', 8)
+        for url in (
+            '/api/v1/titles/top/',
+            f'/api/v1/titles/{first}/similar/',
+            f'/api/v1/titles/{first}/also-liked/',
+            self.url,
+        ):
+            expected = user_client.get(url).json()
+            for limit in ('-1', '0'):
+                response = user_client.get(f'{url}?limit={limit}')
+                assert response.status_code == HTTPStatus.OK, (
+                    f'Проверьте, что `{url}?limit={limit}` возвращает 200.'
+                )
+                assert response.json() == expected, (
+                    f'Проверьте, что неположительный `limit` в `{url}` '
+                    'заменяется значением по умолчанию.'
+                )
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25NestedParents:
+
+    def test_01_mismatched_title(self, admin_client, admin, user_client,
+                                 user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        other_title = titles[1]['id']
+        wrong_review_url = (
+            f'/api/v1/titles/{other_title}/reviews/{reviews[0]["id"]}/'
+        )
+        wrong_comments_url = f'{wrong_review_url}comments/'
+        for response in (
+            admin_client.get(wrong_review_url),
+            admin_client.get(wrong_comments_url),
+            admin_client.get(f'{wrong_comments_url}{comments[0]["id"]}/'),
+            user_client.post(wrong_comments_url, data={'text': 'Чужой'}),
+            user_client.patch(
+                f'{wrong_comments_url}{comments[1]["id"]}/',
+                data={'text': 'Чужой'}
+            ),
+            admin_client.delete(f'{wrong_comments_url}{comments[0]["id"]}/'),
+        ):
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что запрос к отзыву или комментариям через '
+                'чужое произведение возвращает ответ со статусом 404.'
+            )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        response = admin_client.get(url)
+        assert response.json()['count'] == len(comments), (
+            'Проверьте, что запросы через чужое произведение не изменили '
+            'комментарии.'
+        )
+
+    def test_02_parent_loaded_once(self, admin_client, admin, user_client,
+                                   user, client, django_assert_num_queries):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        # Отзыв, число комментариев, страница комментариев.
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что родитель загружается один раз за запрос и '
+            'используется и для ETag, и для выборки комментариев.'
+        )
@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ReviewCommentLists:
+
+    def test_01_constant_queries(self, admin_client, admin, user_client,
+                                 user, moderator_client, client,
+                                 django_assert_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        for number in range(5):
+            create_single_comment(
+                moderator_client, titles[0]['id'], reviews[0]['id'],
+                f'comment {number}'
+            )
+        # Родитель и страница с JOIN автора и произведения/отзыва.
+        for list_url in (f'{url}?cursor=', f'{comments_url}?cursor='):
+            with django_assert_num_queries(2):
+                response = client.get(list_url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что список `{list_url}` выбирается с '
+                'авторами одним запросом, без запроса на каждую строку.'
+            )
+        assert response.json()['results'][-1]['review'] == reviews[0]['text']
+
+        # Версия для ETag и сам отзыв с JOIN.
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}{reviews[1]["id"]}/')
+        assert response.json()['author'] == user.username
+        assert response.json()['title'] == titles[0]['name']
+
+    def test_02_cursor_pagination(self, admin_client, admin, user_client,
+                                  user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        for number in range(5):
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[0]['id'],
+                f'comment {number}'
+            )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        expected = [
+            item['id'] for item in client.get(f'{url}?limit=100').json()[
+                'results'
+            ]
+        ]
+        assert len(expected) == len(comments) + 5
+
+        seen = []
+        next_url = f'{url}?cursor=&limit=3'
+        pages = []
+        while next_url:
+            data = client.get(next_url).json()
+            assert 'count' not in data
+            pages.append(data)
+            seen.extend(item['id'] for item in data['results'])
+            next_url = data['next']
+        assert seen == expected, (
+            'Проверьте, что курсорная пагинация отзывов и комментариев '
+            'обходит все строки по порядку `pub_date`, `id` без повторов.'
+        )
+        previous = client.get(pages[-1]['previous']).json()
+        assert [item['id'] for item in previous['results']] == [
+            item['id'] for item in pages[-2]['results']
+        ], 'Проверьте ссылку на предыдущую страницу.'
@@ -0,0 +1,82 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27ReviewUpsert:
+
+    def test_01_put_mine(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        url = f'{title_url}reviews/mine/'
+        assert client.put(
+            url, data=json.dumps({'text': 'Аноним', 'score': 5}),
+            content_type='application/json'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{url}` без своего отзыва '
+            'возвращает 404.'
+        )
+
+        response = user_client.put(
+            url, data=json.dumps({'text': 'Неплохо', 'score': 6}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что PUT-запрос к `{url}` без отзыва создаёт его.'
+        )
+        review_id = response.json()['id']
+        assert admin_client.get(title_url).json()['rating'] == 6
+
+        response = user_client.put(
+            url, data=json.dumps({'text': 'Отлично', 'score': 9}),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что повторный PUT-запрос к `{url}` заменяет отзыв.'
+        )
+        assert response.json()['id'] == review_id
+        assert user_client.get(url).json()['text'] == 'Отлично'
+        assert admin_client.get(title_url).json()['rating'] == 9, (
+            'Проверьте, что замена отзыва пересчитывает рейтинг.'
+        )
+        assert user_client.put(
+            url, data=json.dumps({'text': 'Без оценки'}),
+            content_type='application/json'
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_duplicate_post(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Первый', 7)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                url, data={'text': 'Второй', 'score': 1}
+            )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв возвращает ответ со статусом 400.'
+        )
+        assert response.json() == {
+            'non_field_errors': ['Может существовать только один отзыв!']
+        }, (
+            'Проверьте, что ошибка повторного отзыва возвращается в поле '
+            '`non_field_errors`.'
+        )
+        assert not any(
+            query['sql'].startswith('SELECT')
+            and 'reviews_review' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что повторный отзыв отсекается ограничением БД, '
+            'а не предварительным запросом.'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что отклонённый отзыв не изменил рейтинг.'
+        )
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28UserActivity:
+
+    def test_01_reviews(self, admin_client, admin, user_client, user,
+                        client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        create_single_review(user_client, titles[1]['id'], 'Второй', 8)
+        url = f'/api/v1/users/{user.username}/reviews/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        assert admin_client.get(
+            '/api/v1/users/nobody/reviews/'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+        response = admin_client.get(f'{url}?limit=1')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает 200.'
+        )
+        data = response.json()
+        assert data['results'] == [{
+            'id': data['results'][0]['id'],
+            'title': {'id': titles[1]['id'], 'name': titles[1]['name']},
+            'text': 'Второй',
+            'score': 8,
+            'pub_date': data['results'][0]['pub_date'],
+        }], (
+            'Проверьте, что отзывы пользователя выводятся новыми первыми, '
+            'с названием и id произведения.'
+        )
+        older = admin_client.get(data['next']).json()
+        assert [item['id'] for item in older['results']] == [
+            reviews[1]['id']
+        ]
+        assert older['next'] is None
+
+        mine = user_client.get('/api/v1/users/me/reviews/').json()
+        assert [item['text'] for item in mine['results']] == [
+            'Второй', reviews[1]['text']
+        ], 'Проверьте эндпоинт `/api/v1/users/me/reviews/`.'
+
+    def test_02_comments(self, admin_client, admin, user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/users/{admin.username}/comments/'
+        with CaptureQueriesContext(connection) as context:
+            data = admin_client.get(url).json()
+        assert data['results'] == [{
+            'id': comments[0]['id'],
+            'review': reviews[0]['id'],
+            'title': {'id': titles[0]['id'], 'name': titles[0]['name']},
+            'text': comments[0]['text'],
+            'pub_date': data['results'][0]['pub_date'],
+        }], (
+            'Проверьте, что комментарии пользователя выводятся с '
+            'произведением.'
+        )
+        assert not any(
+            'reviews_title' in query['sql']
+            and 'reviews_comment' not in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что произведения загружаются одним запросом с JOIN.'
+        mine = user_client.get('/api/v1/users/me/comments/').json()
+        assert [item['id'] for item in mine['results']] == [
+            comments[1]['id']
+        ], 'Проверьте эндпоинт `/api/v1/users/me/comments/`.'
@@ -0,0 +1,136 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Counters:
+
+    def test_01_counts_follow_writes(self, admin_client, admin, user_client,
+                                     user, moderator_client, moderator):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        create_single_comment(
+            moderator_client, titles[0]['id'], reviews[0]['id'], 'Третий'
+        )
+        assert admin_client.get(url).json()['comments_count'] == 3, (
+            'Проверьте, что отзыв выводит число своих комментариев.'
+        )
+        assert admin_client.get(title_url).json()['reviews_count'] == 2, (
+            'Проверьте, что произведение выводит число своих отзывов.'
+        )
+        user_client.delete(f'{url}comments/{comments[1]["id"]}/')
+        assert admin_client.get(url).json()['comments_count'] == 2
+
+        moderator.delete()
+        assert admin_client.get(url).json()['comments_count'] == 1, (
+            'Проверьте, что каскадное удаление комментариев вместе с '
+            'автором уменьшает счётчик.'
+        )
+        user.delete()
+        assert admin_client.get(title_url).json()['reviews_count'] == 1, (
+            'Проверьте, что каскадное удаление отзывов уменьшает счётчик.'
+        )
+        assert admin_client.patch(
+            url, data={'comments_count': 100}
+        ).json()['comments_count'] == 1, (
+            'Проверьте, что `comments_count` доступен только для чтения.'
+        )
+
+    def test_02_repair_counters(self, admin_client, admin, user_client,
+                                user, capsys):
+        from reviews.models import Review, Title
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Review.objects.filter(pk=reviews[0]['id']).update(comments_count=7)
+        Title.objects.filter(pk=titles[0]['id']).update(rating_count=9)
+
+        call_command('repair_counters', '--check')
+        assert 'отзывов - 1, произведений - 1' in capsys.readouterr().out
+        assert Review.objects.get(pk=reviews[0]['id']).comments_count == 7
+
+        call_command('repair_counters')
+        assert Review.objects.get(
+            pk=reviews[0]['id']
+        ).comments_count == len(comments)
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['reviews_count'] == len(reviews), (
+            'Проверьте, что команда `repair_counters` исправляет счётчики.'
+        )
+        call_command('repair_counters', '--check')
+        assert 'отзывов - 0, произведений - 0' in capsys.readouterr().out
+
+    def test_03_comment_changes_review_etags(self, admin_client, admin,
+                                             user_client, user, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        list_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        detail_url = f'{list_url}{reviews[0]["id"]}/'
+        etags = {url: client.get(url)['ETag'] for url in (
+            list_url, detail_url
+        )}
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'Ещё один'
+        )
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что новый комментарий меняет ETag `{url}`: '
+                'в ответе изменился `comments_count`.'
+            )
+            etags[url] = response['ETag']
+        user_client.delete(f'{detail_url}comments/{comments[1]["id"]}/')
+        for url, etag in etags.items():
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == HTTPStatus.OK, (
+                f'Проверьте, что удаление комментария меняет ETag `{url}`.'
+            )
+
+    def test_04_repair_changes_etags(self, admin_client, admin, user_client,
+                                     user, client):
+        from reviews import leaderboards
+        from reviews.models import Review, Title
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        Title.objects.filter(pk=title_id).update(
+            rating=10, rating_sum=90, rating_count=9
+        )
+        Review.objects.filter(pk=reviews[0]['id']).update(comments_count=7)
+        leaderboards.refresh_title(title_id)
+        title_url = f'/api/v1/titles/{title_id}/'
+        list_url = f'{title_url}reviews/'
+        urls = (title_url, list_url, f'{list_url}{reviews[0]["id"]}/')
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        assert client.get(title_url).json()['reviews_count'] == 9
+
+        call_command('repair_counters')
+        for url, etag in etags.items():
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == HTTPStatus.OK, (
+                f'Проверьте, что `repair_counters` меняет ETag `{url}`.'
+            )
+        title = Title.objects.get(pk=title_id)
+        top = {
+            item['id']: item['score']
+            for item in client.get('/api/v1/titles/top/').json()
+        }
+        assert top[title_id] == round(leaderboards.bayesian_score(
+            title.rating_sum, title.rating_count
+        ), 3), (
+            'Проверьте, что `repair_counters` обновляет рейтинговые таблицы.'
+        )
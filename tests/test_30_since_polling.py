@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30SincePolling:
+
+    def test_01_comments(self, admin_client, admin, user_client, user,
+                         client, django_assert_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        data = client.get(f'{url}?since=').json()
+        assert [item['id'] for item in data['results']] == [
+            comment['id'] for comment in comments
+        ], 'Проверьте, что пустой `since` возвращает список с начала.'
+        cursor = data['cursor']
+        assert cursor, (
+            'Проверьте, что ответ с `since` содержит курсор для опроса.'
+        )
+
+        # Родитель (версия списка) и выборка новых строк по индексу.
+        with django_assert_num_queries(2):
+            response = client.get(f'{url}?since={cursor}')
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что при отсутствии новых комментариев опрос с '
+            '`since` возвращает 204 без тела.'
+        )
+        assert not response.content
+        assert response['X-Cursor'] == cursor
+
+        new = create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'Новый'
+        ).json()
+        response = client.get(f'{url}?since={cursor}')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [new['id']], (
+            'Проверьте, что опрос с `since` возвращает только строки новее '
+            'курсора.'
+        )
+        assert data['cursor'] != cursor
+        assert response['X-Cursor'] == data['cursor']
+        assert client.get(
+            f'{url}?since={data["cursor"]}'
+        ).status_code == HTTPStatus.NO_CONTENT
+
+    def test_02_reviews_pages(self, admin_client, admin, user_client, user,
+                              moderator_client, moderator, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {
+                admin: admin_client, user: user_client,
+                moderator: moderator_client,
+            }
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(f'{url}?since=&limit=2').json()
+        assert len(data['results']) == 2
+        rest = client.get(data['next']).json()
+        assert [
+            item['id'] for item in data['results'] + rest['results']
+        ] == [review['id'] for review in reviews], (
+            'Проверьте, что при большом числе новых отзывов опрос с `since` '
+            'разбивается на страницы ссылкой `next`.'
+        )
+        assert rest['next'] is None
+        assert client.get(
+            f'{url}?since=bad'
+        ).status_code == HTTPStatus.NOT_FOUND